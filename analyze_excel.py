@@ -7,6 +7,34 @@
 
 import pandas as pd
 import json
+import argparse
+from datetime import datetime, date
+
+from sketches import ReservoirSample, SpaceSaving, KMVCardinality
+
+# 需求工单统计表的标准列名，用于识别真实表头行
+EXPECTED_COLUMNS = [
+    '流水号', '申请人', '所在部门', '创建日期', '工单类型',
+    '工单类型子类型', 'OA系统', '营销平台', 'U8C',
+    '需求内容', '审核状态', '流程状态'
+]
+# 系统勾选列的合法取值
+CHECKBOX_COLUMNS = ['OA系统', '营销平台', 'U8C']
+CHECKBOX_VALUES = {'勾选', '未勾选'}
+DATE_COLUMNS = ['创建日期']
+DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S', '%Y年%m月%d日']
+
+# 表头探测最多扫描的行数
+HEADER_SCAN_ROWS = 20
+# 默认最多扫描的数据行数
+DEFAULT_ROW_BUDGET = 200000
+# 每列保留的高频值个数和样本数
+TOP_K = 10
+SAMPLE_SIZE = 20
+# 不同值数量达到非空值数量的该比例时视为高基数列（如流水号），不输出高频值
+HIGH_CARDINALITY_RATIO = 0.9
+# 每类异常最多保留的示例数
+ANOMALY_EXAMPLES = 20
 
 def analyze_excel_data(file_path):
     """
@@ -75,19 +103,251 @@ def analyze_excel_data(file_path):
     except Exception as e:
         return {"错误": str(e)}
 
+def normalize_header(value):
+    """
+    规范化表头单元格，例如 "审核状态_系统字段" -> "审核状态"
+    """
+    if value is None:
+        return ''
+    name = str(value).strip()
+    if name.endswith('_系统字段'):
+        name = name[:-len('_系统字段')]
+    return name
+
+def detect_header_row(rows):
+    """
+    在前若干行中识别真实表头行
+    优先选择与标准列名匹配最多的行，否则选择非空文本单元格最多的行
+    
+    Args:
+        rows (list): 工作簿前若干行的单元格值
+    
+    Returns:
+        int: 表头所在行的下标（从0开始）
+    """
+    best_index, best_score = 0, -1
+    for index, row in enumerate(rows):
+        names = [normalize_header(v) for v in row]
+        matched = sum(1 for name in names if name in EXPECTED_COLUMNS)
+        if matched >= 3:
+            return index
+        text_cells = sum(1 for v in row if isinstance(v, str) and v.strip())
+        if text_cells > best_score:
+            best_index, best_score = index, text_cells
+    return best_index
+
+def classify_value(value):
+    """返回单元格值的类型名称"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return 'empty'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, (datetime, date)):
+        return 'date'
+    return 'text'
+
+def parse_date_value(value):
+    """将单元格值解析为日期，无法解析时返回None"""
+    if isinstance(value, (datetime, date)):
+        return value
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+class ColumnProfile:
+    """
+    单列的流式画像：类型分布、空值、高频值、基数估计和样本
+    """
+    
+    def __init__(self, name, top_k=TOP_K, sample_size=SAMPLE_SIZE):
+        self.name = name
+        self.top_k = top_k
+        self.count = 0
+        self.types = {}
+        self.heavy_hitters = SpaceSaving(top_k * 5)
+        self.cardinality = KMVCardinality()
+        self.sample = ReservoirSample(sample_size, seed=0)
+    
+    def add(self, value):
+        self.count += 1
+        kind = classify_value(value)
+        self.types[kind] = self.types.get(kind, 0) + 1
+        if kind == 'empty':
+            return
+        key = value.strftime('%Y-%m-%d') if kind == 'date' else str(value).strip()
+        self.heavy_hitters.add(key)
+        self.cardinality.add(key)
+        self.sample.add(key)
+    
+    def top_values(self, distinct):
+        """
+        可信的高频值：计数下限（计数 - 误差）须超过未被跟踪项的计数上限，
+        否则只是计数器替换留下的噪声；高基数列不输出
+        """
+        non_empty = self.count - self.types.get('empty', 0)
+        if non_empty and distinct >= HIGH_CARDINALITY_RATIO * non_empty:
+            return True, []
+        untracked_max = self.heavy_hitters.min_count()
+        return False, [
+            {"值": item, "计数": count, "误差上限": error}
+            for item, count, error in self.heavy_hitters.top(self.top_k)
+            if count - error > untracked_max
+        ]
+    
+    def to_dict(self):
+        empty = self.types.get('empty', 0)
+        distinct = self.cardinality.estimate()
+        high_cardinality, top_values = self.top_values(distinct)
+        return {
+            "类型分布": dict(sorted(self.types.items(), key=lambda kv: -kv[1])),
+            "空值率": round(empty / self.count, 4) if self.count else 0,
+            "不同值数量": distinct,
+            "不同值数量为精确值": self.cardinality.is_exact(),
+            "高基数列": high_cardinality,
+            "高频值": top_values,
+            "样本": self.sample.items
+        }
+
+def add_anomaly(anomalies, kind, row_number, column, value):
+    """记录一条异常，只保留有限的、值不重复的示例"""
+    bucket = anomalies.setdefault(kind, {"数量": 0, "示例": []})
+    bucket["数量"] += 1
+    if len(bucket["示例"]) < ANOMALY_EXAMPLES and all(e["值"] != str(value) for e in bucket["示例"]):
+        bucket["示例"].append({"行号": row_number, "列": column, "值": str(value)})
+
+def profile_excel_data(file_path, max_rows=DEFAULT_ROW_BUDGET, check_departments=True):
+    """
+    以流式方式单次遍历工作簿，生成每列的数据画像和异常统计
+    用于导入前快速检查表结构是否变化，内存占用与行数无关
+    
+    Args:
+        file_path (str): Excel文件路径
+        max_rows (int): 最多扫描的数据行数，None表示不限制
+        check_departments (bool): 是否对照启用组织.xlsx检查未映射的部门
+    
+    Returns:
+        dict: 数据画像结果
+    """
+    from openpyxl import load_workbook
+    
+    try:
+        known_departments = None
+        if check_departments:
+            from data_processor import load_organization_structure, clean_department_name
+            _, dept_to_top_level = load_organization_structure()
+            known_departments = set(dept_to_top_level) or None
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            # 导出文件的dimension信息不可靠（如"A1"），需按实际内容读取
+            sheet.reset_dimensions()
+            rows = sheet.iter_rows(values_only=True)
+            
+            # 读取前若干行用于识别表头
+            head_rows = []
+            for row in rows:
+                head_rows.append(row)
+                if len(head_rows) >= HEADER_SCAN_ROWS:
+                    break
+            if not head_rows:
+                return {"错误": "工作表为空"}
+            
+            header_index = detect_header_row(head_rows)
+            header = [normalize_header(v) or f'列{i + 1}' for i, v in enumerate(head_rows[header_index])]
+            missing_columns = [col for col in EXPECTED_COLUMNS if col not in header]
+            unexpected_columns = [col for col in header if col not in EXPECTED_COLUMNS]
+            
+            profiles = [ColumnProfile(name) for name in header]
+            column_index = {name: i for i, name in enumerate(header)}
+            anomalies = {}
+            scanned = 0
+            truncated = False
+            
+            def data_rows():
+                yield from head_rows[header_index + 1:]
+                yield from rows
+            
+            for offset, row in enumerate(data_rows()):
+                if max_rows is not None and scanned >= max_rows:
+                    truncated = True
+                    break
+                # 跳过全空行
+                if not any(v is not None and str(v).strip() for v in row):
+                    continue
+                scanned += 1
+                row_number = header_index + 2 + offset  # Excel中的行号（从1开始）
+                
+                if len(row) > len(header):
+                    add_anomaly(anomalies, "超出表头的列", row_number, len(row), row[len(header):])
+                for i, profile in enumerate(profiles):
+                    profile.add(row[i] if i < len(row) else None)
+                
+                for col in DATE_COLUMNS:
+                    i = column_index.get(col)
+                    if i is not None and i < len(row) and classify_value(row[i]) != 'empty':
+                        if parse_date_value(row[i]) is None:
+                            add_anomaly(anomalies, "无法解析的日期", row_number, col, row[i])
+                
+                for col in CHECKBOX_COLUMNS:
+                    i = column_index.get(col)
+                    if i is not None and i < len(row) and classify_value(row[i]) != 'empty':
+                        if str(row[i]).strip() not in CHECKBOX_VALUES:
+                            add_anomaly(anomalies, "未知的勾选值", row_number, col, row[i])
+                
+                i = column_index.get('所在部门')
+                if known_departments and i is not None and i < len(row) and classify_value(row[i]) != 'empty':
+                    if clean_department_name(row[i]) not in known_departments:
+                        add_anomaly(anomalies, "未映射的部门", row_number, '所在部门', row[i])
+        finally:
+            workbook.close()
+        
+        return {
+            "表头行号": header_index + 1,
+            "列名": header,
+            "缺失的标准列": missing_columns,
+            "非标准列": unexpected_columns,
+            "扫描行数": scanned,
+            "达到行数上限": truncated,
+            "列画像": {profile.name: profile.to_dict() for profile in profiles},
+            "异常": anomalies
+        }
+        
+    except Exception as e:
+        return {"错误": str(e)}
+
 if __name__ == "__main__":
-    # Excel文件路径
-    excel_file = "/Users/kangyiyuan/Desktop/AI编程项目/需求工单分析2/需求工单统计表.xlsx"
+    parser = argparse.ArgumentParser(description='需求工单数据分析')
+    parser.add_argument('excel_file', nargs='?',
+                        default="/Users/kangyiyuan/Desktop/AI编程项目/需求工单分析2/需求工单统计表.xlsx",
+                        help='Excel文件路径')
+    parser.add_argument('--profile', action='store_true', help='流式抽样画像模式，用于导入前检查表结构')
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_ROW_BUDGET, help='画像模式最多扫描的数据行数')
+    parser.add_argument('--no-org-check', action='store_true', help='画像模式不检查未映射的部门')
+    args = parser.parse_args()
     
-    # 分析数据
-    result = analyze_excel_data(excel_file)
+    if args.profile:
+        result = profile_excel_data(args.excel_file, max_rows=args.max_rows,
+                                    check_departments=not args.no_org_check)
+        output_file = "data_profile_result.json"
+        print("=== 需求工单数据画像 ===")
+    else:
+        # 分析数据
+        result = analyze_excel_data(args.excel_file)
+        output_file = "data_analysis_result.json"
+        print("=== 需求工单数据分析结果 ===")
     
     # 输出结果
-    print("=== 需求工单数据分析结果 ===")
     print(json.dumps(result, ensure_ascii=False, indent=2))
     
     # 保存分析结果到文件
-    with open("data_analysis_result.json", "w", encoding="utf-8") as f:
+    with open(output_file, "w", encoding="utf-8") as f:
         json.dump(result, f, ensure_ascii=False, indent=2)
     
-    print("\n分析结果已保存到 data_analysis_result.json 文件")
\ No newline at end of file
+    print(f"\n分析结果已保存到 {output_file} 文件")
\ No newline at end of file
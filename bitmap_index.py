@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工单位图索引
+为每个分类列的每个取值以及每个时间段建立一个行位图（Python整数按位存储），
+任意 AND/OR/NOT 筛选组合只需几次位运算，计数和分组统计也无需重新扫描数据行
+"""
+
+import os
+import re
+import json
+import zlib
+import base64
+import threading
+
+
+def bitmap_from_positions(positions):
+    """由行号序列构建位图（先写入字节数组再整体转换，避免逐位生成大整数）"""
+    positions = [int(p) for p in positions]
+    if not positions:
+        return 0
+    buffer = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def iter_positions(bitmap):
+    """按升序遍历位图中置位的行号"""
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    # 按8字节分块转换，跳过全零块，避免对大整数反复移位
+    for offset in range(0, len(raw), 8):
+        chunk = int.from_bytes(raw[offset:offset + 8], 'little')
+        base = offset * 8
+        while chunk:
+            low = chunk & -chunk
+            yield base + low.bit_length() - 1
+            chunk ^= low
+
+
+def encode_bitmap(bitmap):
+    """压缩并编码位图，用于保存到JSON"""
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    return base64.b64encode(zlib.compress(raw)).decode('ascii')
+
+
+def decode_bitmap(text):
+    return int.from_bytes(zlib.decompress(base64.b64decode(text)), 'little')
+
+
+class FilterSyntaxError(ValueError):
+    """筛选表达式语法错误"""
+
+
+# 词法单元：括号、运算符、列=值 / 列!=值 条件（列名和值可用双引号包含空格或括号）
+TOKEN_PATTERN = re.compile(
+    r'\s*(?:(\()|(\))|(AND|OR|NOT)(?=[\s()]|$)|("[^"]*"|[^\s=()!"]+)\s*(!?=)\s*("[^"]*"|[^\s()"]+))',
+    re.IGNORECASE
+)
+
+
+def tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match or match.end() == position:
+            raise FilterSyntaxError(f"无法解析的筛选条件: {expression[position:]}")
+        left, right, operator, column, comparator, value = match.groups()
+        if left:
+            tokens.append(('(', None))
+        elif right:
+            tokens.append((')', None))
+        elif operator:
+            tokens.append((operator.upper(), None))
+        else:
+            tokens.append(('TERM', (column.strip('"'), comparator, value.strip('"'))))
+        position = match.end()
+    return tokens
+
+
+class BitmapIndex:
+    """
+    工单行位图索引
+
+    筛选表达式示例：
+        U8C=勾选 AND 流程状态=未结束 AND 半年度=2024H2 AND 一级部门=财务管理中心
+        (OA系统=勾选 OR 营销平台=勾选) AND NOT 审核状态=草稿
+    """
+
+    def __init__(self, row_count, columns=None, row_keys=None):
+        self.row_count = row_count
+        self.universe = (1 << row_count) - 1
+        self.columns = columns or {}  # 列名 -> {取值: 位图}
+        self.row_keys = row_keys or []  # 行号 -> 流水号
+
+    def add_column(self, name, value_positions):
+        """添加一列，value_positions为 {取值: 行号序列}"""
+        self.columns[name] = {
+            str(value): bitmap_from_positions(positions)
+            for value, positions in value_positions.items()
+        }
+
+    def lookup(self, column, value):
+        if column not in self.columns:
+            raise FilterSyntaxError(f"未建立索引的列: {column}")
+        return self.columns[column].get(str(value), 0)
+
+    def evaluate(self, expression):
+        """
+        计算筛选表达式，返回结果位图；表达式为空时返回全部行
+        优先级：NOT > AND > OR，相邻条件之间省略运算符时视为AND
+        """
+        if not expression or not expression.strip():
+            return self.universe
+        tokens = tokenize(expression)
+        position = 0
+
+        def peek():
+            return tokens[position][0] if position < len(tokens) else None
+
+        def parse_or():
+            nonlocal position
+            result = parse_and()
+            while peek() == 'OR':
+                position += 1
+                result |= parse_and()
+            return result
+
+        def parse_and():
+            nonlocal position
+            result = parse_not()
+            while peek() in ('AND', 'NOT', 'TERM', '('):
+                if peek() == 'AND':
+                    position += 1
+                result &= parse_not()
+            return result
+
+        def parse_not():
+            nonlocal position
+            if peek() == 'NOT':
+                position += 1
+                return self.universe & ~parse_not()
+            return parse_atom()
+
+        def parse_atom():
+            nonlocal position
+            kind = peek()
+            if kind == '(':
+                position += 1
+                result = parse_or()
+                if peek() != ')':
+                    raise FilterSyntaxError("缺少右括号")
+                position += 1
+                return result
+            if kind == 'TERM':
+                column, comparator, value = tokens[position][1]
+                position += 1
+                bitmap = self.lookup(column, value)
+                return self.universe & ~bitmap if comparator == '!=' else bitmap
+            raise FilterSyntaxError("筛选条件不完整")
+
+        result = parse_or()
+        if position != len(tokens):
+            raise FilterSyntaxError("筛选条件中有多余的内容")
+        return result
+
+    def conjunction(self, conditions):
+        """
+        计算多个条件的交集，conditions为 {列名: [取值, ...]}，同一列的多个取值取并集
+        """
+        result = self.universe
+        for column, values in conditions.items():
+            union = 0
+            for value in values:
+                union |= self.lookup(column, value)
+            result &= union
+        return result
+
+    @staticmethod
+    def count(bitmap):
+        return bitmap.bit_count()
+
+    def group_by(self, bitmap, column):
+        """按列分组统计位图中的行数，按数量降序返回 [(取值, 数量), ...]"""
+        if column not in self.columns:
+            raise FilterSyntaxError(f"未建立索引的列: {column}")
+        groups = []
+        for value, value_bitmap in self.columns[column].items():
+            count = (bitmap & value_bitmap).bit_count()
+            if count:
+                groups.append((value, count))
+        groups.sort(key=lambda kv: (-kv[1], kv[0]))
+        return groups
+
+    def rows(self, bitmap):
+        """按行号升序遍历位图中的行"""
+        return iter_positions(bitmap)
+
+    def to_dict(self):
+        return {
+            'row_count': self.row_count,
+            'row_keys': self.row_keys,
+            'columns': {
+                column: {value: encode_bitmap(bitmap) for value, bitmap in values.items()}
+                for column, values in self.columns.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = {
+            column: {value: decode_bitmap(text) for value, text in values.items()}
+            for column, values in data['columns'].items()
+        }
+        return cls(data['row_count'], columns, data.get('row_keys'))
+
+
+class BitmapIndexStore:
+    """
+    上传服务器使用的位图索引，从bitmap_index.json加载并在文件更新后自动重新加载
+    """
+
+    def __init__(self, file_path):
+        self.file_path = str(file_path)
+        self.lock = threading.Lock()
+        self.mtime_ns = None
+        self.index = None
+
+    def get_index(self):
+        stat_result = os.stat(self.file_path)
+        with self.lock:
+            if self.mtime_ns != stat_result.st_mtime_ns:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    self.index = BitmapIndex.from_dict(json.load(f))
+                self.mtime_ns = stat_result.st_mtime_ns
+            return self.index
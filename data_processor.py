@@ -6,10 +6,25 @@
 """
 
 import pandas as pd
-import json
 from datetime import datetime
 import re
 from collections import Counter
+import argparse
+
+from org_index import build_euler_index, UNMAPPED_CODE
+from json_stream import StreamingJSONWriter, OutputBatch, format_section_sizes
+from snapshot_diff import snapshot_id_from_title, save_snapshot, write_latest_diff
+from bitmap_index import BitmapIndex, bitmap_from_positions
+from heavy_hitters import HeavyHitterTracker, TRACKED_FIELDS, half_year_of, summarize_heavy_hitters
+import near_duplicates
+import ticket_store
+from xlsx_parallel import read_excel
+
+# 建立位图索引的分类列
+INDEXED_COLUMNS = [
+    '所在部门', '一级部门', '申请人', '工单类型', '工单类型子类型',
+    'OA系统', '营销平台', 'U8C', '审核状态', '流程状态'
+]
 
 def clean_department_name(dept_name):
     """
@@ -111,18 +126,243 @@ def map_to_top_level_department(dept_name, dept_to_top_level):
     # 查找映射
     return dept_to_top_level.get(cleaned_name, cleaned_name)
 
-def process_ticket_data(excel_file):
+def load_organization_nodes(org_file='启用组织.xlsx'):
     """
-    处理需求工单数据
+    读取启用组织.xlsx文件，返回组织树节点列表
+    返回：[(编码, 名称, 上级编码), ...]
+    """
+    try:
+        org_df = pd.read_excel(org_file)
+    except Exception as e:
+        print(f"加载组织结构文件失败: {e}")
+        return []
+    
+    org_nodes = []
+    for index, row in org_df.iterrows():
+        if index == 0:  # 跳过标题行
+            continue
+        dept_name = str(row['Name']).strip()
+        dept_code = str(row['Code']).strip()
+        parent_code = str(row['PDepartmentCode']).strip() if pd.notna(row['PDepartmentCode']) else None
+        if parent_code == 'nan':
+            parent_code = None
+        if dept_code and dept_code != 'nan' and dept_name:
+            org_nodes.append((dept_code, dept_name, parent_code))
+    return org_nodes
+
+def map_org_positions(df, org_nodes):
+    """
+    将每条工单的所在部门映射到组织树的先序位置
+    
+    Returns:
+        tuple: (先序节点列表, 与df行对齐的位置Series)
+    """
+    nodes = build_euler_index(org_nodes)
+    code_to_position = {node['code']: node['tin'] for node in nodes}
+    
+    # 同名部门以组织文件中第一次出现的为准
+    name_to_position = {}
+    for code, name, _ in org_nodes:
+        name_to_position.setdefault(name, code_to_position[code])
+    unmapped_position = code_to_position[UNMAPPED_CODE]
+    
+    positions = df['所在部门'].map(lambda name: name_to_position.get(name, unmapped_position))
+    return nodes, positions
+
+def build_org_rollup(df, org_nodes):
+    """
+    按组织树先序位置统计工单数量，用于任意层级部门的子树汇总
     
     Args:
-        excel_file (str): Excel文件路径
+        df (DataFrame): 已清理部门名称并计算年份的工单数据
+        org_nodes (list): load_organization_nodes() 返回的节点列表
     
     Returns:
-        dict: 处理后的数据
+        dict: {'nodes': 先序节点列表, 'measures': {度量名: {位置: 计数}}}
+    """
+    nodes, positions = map_org_positions(df, org_nodes)
+    unmapped_position = next(node['tin'] for node in nodes if node['code'] == UNMAPPED_CODE)
+    
+    def sparse_counts(mask=None, by=None):
+        """统计每个位置（及分组列）的工单数，返回 {分组值: {位置: 计数}}"""
+        data = positions if mask is None else positions[mask]
+        if by is None:
+            return {None: {str(pos): int(cnt) for pos, cnt in data.value_counts().items()}}
+        keys = by if mask is None else by[mask]
+        grouped = {}
+        for (key, pos), cnt in data.groupby([keys, data]).size().items():
+            grouped.setdefault(key, {})[str(pos)] = int(cnt)
+        return grouped
+    
+    years = df['年份'].map(lambda y: str(int(y)) if pd.notna(y) else None)
+    no_draft = df['审核状态'] != '草稿'
+    
+    measures = {}
+    measures['total'] = sparse_counts()[None]
+    measures['no_draft'] = sparse_counts(no_draft)[None]
+    for year, counts in sparse_counts(years.notna(), years).items():
+        measures[f'year:{year}'] = counts
+    for year, counts in sparse_counts(years.notna() & no_draft, years).items():
+        measures[f'no_draft_year:{year}'] = counts
+    for system in ['OA系统', '营销平台', 'U8C']:
+        measures[f'system:{system}'] = sparse_counts(df[system] == '勾选')[None]
+    type_mask = df['工单类型子类型'].notna() & (df['工单类型子类型'] != '')
+    for ticket_type, counts in sparse_counts(type_mask, df['工单类型子类型']).items():
+        measures[f'type:{ticket_type}'] = counts
+    for status, counts in sparse_counts(df['流程状态'].notna(), df['流程状态']).items():
+        measures[f'status:{status}'] = counts
+    
+    unmapped = int((positions == unmapped_position).sum())
+    print(f"组织层级汇总完成，共{len(nodes)}个节点，{unmapped}条工单未匹配到组织")
+    return {'nodes': nodes, 'measures': measures}
+
+def build_bitmap_index(df, org_nodes):
     """
-    # 读取Excel文件
-    df = pd.read_excel(excel_file)
+    为工单建立位图索引：每个分类列取值、每个时间段以及每个组织节点（含下级）各一个行位图
+    
+    Args:
+        df (DataFrame): 已映射一级部门并解析创建日期的工单数据
+        org_nodes (list): load_organization_nodes() 返回的节点列表
+    
+    Returns:
+        BitmapIndex: 位图索引
+    """
+    index = BitmapIndex(len(df), row_keys=[str(serial) for serial in df['流水号']])
+    
+    def value_positions(values):
+        """{取值: 行号数组}，行号为df中的位置"""
+        values = pd.Series(list(values))
+        return values.groupby(values, dropna=True).indices
+    
+    for column in INDEXED_COLUMNS:
+        index.add_column(column, value_positions(df[column]))
+    
+    dates = df['创建日期']
+    index.add_column('年份', value_positions(dates.dt.strftime('%Y')))
+    index.add_column('半年度', value_positions(
+        dates.dt.strftime('%Y') + 'H' + (dates.dt.month > 6).map({False: '1', True: '2'})))
+    index.add_column('月份', value_positions(dates.dt.strftime('%Y-%m')))
+    
+    # 组织节点位图包含其所有下级部门的工单，子树为先序区间 [tin, tout)
+    nodes, positions = map_org_positions(df, org_nodes)
+    direct = {}
+    for position, rows in value_positions(positions).items():
+        direct[int(position)] = bitmap_from_positions(rows)
+    org_bitmaps = {}
+    for node in nodes:
+        bitmap = 0
+        for position in range(node['tin'], node['tout']):
+            bitmap |= direct.get(position, 0)
+        if bitmap:
+            org_bitmaps[node['code']] = bitmap
+    index.columns['组织'] = org_bitmaps
+    
+    return index
+
+def build_heavy_hitters(df):
+    """
+    单次遍历工单，按一级部门和半年度维护申请人、工单类型子类型的Top-K统计
+    
+    Args:
+        df (DataFrame): 已映射一级部门并解析创建日期的工单数据
+    
+    Returns:
+        HeavyHitterTracker: 可合并、可序列化的Top-K统计
+    """
+    tracker = HeavyHitterTracker()
+    columns = ['一级部门', '创建日期', '审核状态'] + list(TRACKED_FIELDS.values())
+    for dept, created, audit, *values in df[columns].itertuples(index=False, name=None):
+        half_year = half_year_of(created)
+        is_draft = audit == '草稿'
+        for field, value in zip(TRACKED_FIELDS, values):
+            tracker.add(field, value, is_draft, dept, half_year)
+    return tracker
+
+def build_near_duplicates(df, max_clusters=200):
+    """
+    检测需求内容近似重复的工单，每个重复簇保留最早创建的一张作为代表
+    
+    Args:
+        df (DataFrame): 已映射一级部门并解析创建日期的工单数据
+        max_clusters (int): 报告中最多列出的重复簇数
+    
+    Returns:
+        tuple: (重复簇报告, 去重后保留的行掩码, 签名缓存)
+    """
+    serials = df['流水号'].astype(str).tolist()
+    cached = near_duplicates.load_signatures()
+    signatures, computed = near_duplicates.compute_signatures(serials, df['需求内容'].tolist(), cached)
+    clusters = near_duplicates.find_clusters(signatures)
+    print(f"近似重复检测完成：新计算签名 {computed} 个，复用 {len(signatures) - computed} 个，"
+          f"发现 {len(clusters)} 个重复簇")
+    
+    rows = df.assign(流水号=serials).set_index('流水号', drop=False).rename_axis(None)
+    rows = rows[~rows.index.duplicated()]
+    duplicates = set()
+    report = []
+    for cluster in clusters:
+        members = rows.loc[cluster['members']].sort_values(['创建日期', '流水号'], na_position='last')
+        duplicates.update(members['流水号'].iloc[1:])
+        if len(report) < max_clusters:
+            report.append({
+                'representative': members['流水号'].iloc[0],
+                'similarity': cluster['similarity'],
+                'departments': sorted(members['一级部门'].dropna().astype(str).unique().tolist()),
+                'content': str(members['需求内容'].iloc[0])[:80],
+                'members': [
+                    {
+                        '流水号': serial,
+                        '申请人': None if pd.isna(applicant) else str(applicant),
+                        '所在部门': None if pd.isna(dept) else str(dept),
+                        '创建日期': created.strftime('%Y-%m-%d') if pd.notna(created) else None
+                    }
+                    for serial, applicant, dept, created in members[['流水号', '申请人', '所在部门', '创建日期']].itertuples(index=False, name=None)
+                ]
+            })
+    
+    summary = {
+        'threshold': near_duplicates.SIMILARITY_THRESHOLD,
+        'total_clusters': len(clusters),
+        'duplicate_tickets': len(duplicates),
+        'checked_tickets': len(signatures),
+        'clusters': report
+    }
+    keep = ~pd.Series(serials, index=df.index).isin(duplicates)
+    return summary, keep, near_duplicates.signatures_to_dict(signatures)
+
+def write_ticket_store(conn, df, org_nodes):
+    """
+    将组织树和工单写入数据库，工单按流水号新增或更新（在调用方提交前其他连接不可见）
+    
+    Args:
+        conn: ticket_store.connect() 返回的可写连接
+        df (DataFrame): 已映射一级部门并解析创建日期的工单数据
+        org_nodes (list): load_organization_nodes() 返回的节点列表
+    
+    Returns:
+        dict: {'inserted': 新增数, 'updated': 更新数, 'total': 库中工单总数}
+    """
+    nodes, positions = map_org_positions(df, org_nodes)
+    ticket_store.replace_org_units(conn, nodes)
+    return ticket_store.upsert_tickets(conn, df, positions.map(lambda position: nodes[position]['code']))
+
+def iter_ticket_sections(excel_file, conn, workers=1):
+    """
+    处理需求工单数据，每完成一项统计即产出一段结果，便于边计算边写入
+    
+    Args:
+        excel_file (str): Excel文件路径
+        conn: ticket_store.connect() 返回的可写连接，写入的工单由调用方在处理成功后提交
+        workers (int): 解析Excel的进程数，大于1时并行解析
+    
+    Yields:
+        tuple: (键, 统计结果)
+    """
+    # 读取Excel文件（多进程时按行块并行解析，结果与串行读取一致）
+    df = read_excel(excel_file, workers)
+    
+    # 第一行为"数据源：需求工单  执行时间：..."，用于标识本次导出
+    export_title = df.iloc[0, 0] if len(df) else None
     
     # 跳过前两行（标题行和表头说明），从第三行开始是真实数据
     df = df.iloc[2:].reset_index(drop=True)
@@ -152,363 +392,283 @@ def process_ticket_data(excel_file):
     df['创建日期'] = pd.to_datetime(df['创建日期'], errors='coerce')
     df['年份'] = df['创建日期'].dt.year
     
-    # 1. 按部门统计工单数量（Top 10）
-    dept_counts = df['所在部门'].value_counts().head(10)
-    dept_top10 = {
-        'labels': dept_counts.index.tolist(),
-        'data': dept_counts.values.tolist()
-    }
+    # 加载组织结构树，并将工单按流水号写入数据库（统计数据由SQL查询生成）
+    org_nodes = load_organization_nodes()
+    store_result = write_ticket_store(conn, df, org_nodes)
+    print(f"工单数据库已更新：新增 {store_result['inserted']} 条，更新 {store_result['updated']} 条，"
+          f"当前导出 {store_result['current']} 条，库中共 {store_result['total']} 条")
     
-    # 1.0 按一级部门统计工单数量（完整列表，用于模态框显示）
-    dept_counts_all = df['一级部门'].value_counts()
-    dept_all = {
-        'labels': dept_counts_all.index.tolist(),
-        'data': dept_counts_all.values.tolist()
-    }
+    # 汇总信息
+    yield 'summary', ticket_store.summary(conn)
     
-    # 1.0.1 按原始部门统计工单数量（完整列表，用于原始部门显示）
-    original_dept_counts_all = df['所在部门'].value_counts()
-    original_dept_all = {
-        'labels': original_dept_counts_all.index.tolist(),
-        'data': original_dept_counts_all.values.tolist()
-    }
+    # 按完整组织层级汇总（不随网站数据一起下发，由上传服务器按需查询）
+    yield 'org_rollup', build_org_rollup(df, org_nodes)
     
-    # 保留原始部门统计的前10名（用于兼容性）
-    dept_counts_top10 = df['一级部门'].value_counts().head(10)
-    dept_top10 = {
-        'labels': dept_counts_top10.index.tolist(),
-        'data': dept_counts_top10.values.tolist()
-    }
+    # 位图索引，供 /api/stats/query 计算任意筛选组合
+    yield 'bitmap_index', build_bitmap_index(df, org_nodes).to_dict()
     
-    # 1.1 按年度分组的一级部门统计
-    dept_by_year = {}
-    dept_by_year_all = {}  # 完整的年度部门统计
-    original_dept_by_year_all = {}  # 完整的年度原始部门统计
-    for year in df['年份'].dropna().unique():
-        year_data = df[df['年份'] == year]
-        year_dept_counts = year_data['一级部门'].value_counts().head(10)
-        dept_by_year[str(int(year))] = {
-            'labels': year_dept_counts.index.tolist(),
-            'data': year_dept_counts.values.tolist()
-        }
-        
-        # 完整的年度部门统计（不限制数量）
-        year_dept_counts_all = year_data['一级部门'].value_counts()
-        dept_by_year_all[str(int(year))] = {
-            'labels': year_dept_counts_all.index.tolist(),
-            'data': year_dept_counts_all.values.tolist()
-        }
-        
-        # 完整的年度原始部门统计（不限制数量）
-        year_original_dept_counts_all = year_data['所在部门'].value_counts()
-        original_dept_by_year_all[str(int(year))] = {
-            'labels': year_original_dept_counts_all.index.tolist(),
-            'data': year_original_dept_counts_all.values.tolist()
-        }
-    
-    # 1.2 排除草稿的一级部门统计
-    df_no_draft = df[df['审核状态'] != '草稿']
-    dept_counts_no_draft = df_no_draft['一级部门'].value_counts().head(10)
-    dept_top10_no_draft = {
-        'labels': dept_counts_no_draft.index.tolist(),
-        'data': dept_counts_no_draft.values.tolist()
-    }
+    # 申请人和工单类型子类型的Top-K统计
+    heavy_hitter_tracker = build_heavy_hitters(df)
     
-    # 1.2.1 排除草稿的一级部门统计（完整列表）
-    dept_counts_all_no_draft = df_no_draft['一级部门'].value_counts()
-    dept_all_no_draft = {
-        'labels': dept_counts_all_no_draft.index.tolist(),
-        'data': dept_counts_all_no_draft.values.tolist()
-    }
+    # 需求内容近似重复检测，df_dedup为每个重复簇只保留代表工单后的数据
+    near_duplicate_report, dedup_mask, minhash_signatures = build_near_duplicates(df)
+    df_dedup = df[dedup_mask]
     
-    # 1.2.2 排除草稿的原始部门统计（完整列表）
-    original_dept_counts_all_no_draft = df_no_draft['所在部门'].value_counts()
-    original_dept_all_no_draft = {
-        'labels': original_dept_counts_all_no_draft.index.tolist(),
-        'data': original_dept_counts_all_no_draft.values.tolist()
+    # 1. 按一级部门统计工单数量（Top 10）
+    yield 'dept_top10', ticket_store.count_by(conn, '一级部门', limit=10)
+    
+    # 1.0 按一级部门统计工单数量（完整列表，用于模态框显示）
+    yield 'dept_all', ticket_store.count_by(conn, '一级部门')
+    
+    # 1.0.2 按一级部门统计工单数量（近似重复工单只计一次）
+    dept_counts_dedup = df_dedup['一级部门'].value_counts()
+    yield 'dept_all_dedup', {
+        'labels': dept_counts_dedup.index.tolist(),
+        'data': dept_counts_dedup.values.tolist()
     }
     
+    # 1.0.1 按原始部门统计工单数量（完整列表，用于原始部门显示）
+    yield 'original_dept_all', ticket_store.count_by(conn, '所在部门')
+    
+    # 1.1 按年度分组的一级部门统计（Top 10、完整列表）及原始部门统计
+    yield 'dept_by_year', ticket_store.count_by_year(conn, '一级部门', limit=10)
+    yield 'dept_by_year_all', ticket_store.count_by_year(conn, '一级部门')
+    yield 'original_dept_by_year_all', ticket_store.count_by_year(conn, '所在部门')
+    
+    # 1.2 排除草稿的一级部门统计（Top 10、完整列表）及原始部门统计
+    no_draft = ticket_store.NO_DRAFT
+    yield 'dept_top10_no_draft', ticket_store.count_by(conn, '一级部门', no_draft, limit=10)
+    yield 'dept_all_no_draft', ticket_store.count_by(conn, '一级部门', no_draft)
+    yield 'original_dept_all_no_draft', ticket_store.count_by(conn, '所在部门', no_draft)
+    
     # 1.3 按年度分组的一级部门统计（排除草稿）
-    dept_by_year_no_draft = {}
-    dept_by_year_all_no_draft = {}  # 完整的年度部门统计（排除草稿）
-    original_dept_by_year_all_no_draft = {}  # 完整的年度原始部门统计（排除草稿）
-    for year in df_no_draft['年份'].dropna().unique():
-        year_data = df_no_draft[df_no_draft['年份'] == year]
-        year_dept_counts = year_data['一级部门'].value_counts().head(10)
-        dept_by_year_no_draft[str(int(year))] = {
-            'labels': year_dept_counts.index.tolist(),
-            'data': year_dept_counts.values.tolist()
-        }
-        
-        # 完整的年度部门统计（排除草稿，不限制数量）
-        year_dept_counts_all = year_data['一级部门'].value_counts()
-        dept_by_year_all_no_draft[str(int(year))] = {
-            'labels': year_dept_counts_all.index.tolist(),
-            'data': year_dept_counts_all.values.tolist()
-        }
-        
-        # 完整的年度原始部门统计（排除草稿，不限制数量）
-        year_original_dept_counts_all = year_data['所在部门'].value_counts()
-        original_dept_by_year_all_no_draft[str(int(year))] = {
-            'labels': year_original_dept_counts_all.index.tolist(),
-            'data': year_original_dept_counts_all.values.tolist()
-        }
+    yield 'dept_by_year_no_draft', ticket_store.count_by_year(conn, '一级部门', no_draft, limit=10)
+    yield 'dept_by_year_all_no_draft', ticket_store.count_by_year(conn, '一级部门', no_draft)
+    yield 'original_dept_by_year_all_no_draft', ticket_store.count_by_year(conn, '所在部门', no_draft)
     
     # 2. 统计各系统勾选情况
-    oa_count = len(df[df['OA系统'] == '勾选'])
-    marketing_count = len(df[df['营销平台'] == '勾选'])
-    u8c_count = len(df[df['U8C'] == '勾选'])
-    
-    system_stats = {
-        'OA系统': oa_count,
-        '营销平台': marketing_count,
-        'U8C': u8c_count
-    }
+    yield 'system_stats', ticket_store.system_counts(conn)
     
     # 2.1 按年度分组的系统统计
-    system_by_year = {}
-    for year in df['年份'].dropna().unique():
-        year_data = df[df['年份'] == year]
-        oa_year = len(year_data[year_data['OA系统'] == '勾选'])
-        marketing_year = len(year_data[year_data['营销平台'] == '勾选'])
-        u8c_year = len(year_data[year_data['U8C'] == '勾选'])
-        system_by_year[str(int(year))] = {
-            'OA系统': oa_year,
-            '营销平台': marketing_year,
-            'U8C': u8c_year
-        }
+    yield 'system_by_year', ticket_store.system_counts_by_year(conn)
     
     # 2.2 系统统计（排除草稿）
-    oa_count_no_draft = len(df_no_draft[df_no_draft['OA系统'] == '勾选'])
-    marketing_count_no_draft = len(df_no_draft[df_no_draft['营销平台'] == '勾选'])
-    u8c_count_no_draft = len(df_no_draft[df_no_draft['U8C'] == '勾选'])
-    
-    system_stats_no_draft = {
-        'OA系统': oa_count_no_draft,
-        '营销平台': marketing_count_no_draft,
-        'U8C': u8c_count_no_draft
-    }
+    yield 'system_stats_no_draft', ticket_store.system_counts(conn, no_draft)
     
     # 2.3 按年度分组的系统统计（排除草稿）
-    system_by_year_no_draft = {}
-    for year in df_no_draft['年份'].dropna().unique():
-        year_data = df_no_draft[df_no_draft['年份'] == year]
-        oa_year = len(year_data[year_data['OA系统'] == '勾选'])
-        marketing_year = len(year_data[year_data['营销平台'] == '勾选'])
-        u8c_year = len(year_data[year_data['U8C'] == '勾选'])
-        system_by_year_no_draft[str(int(year))] = {
-            'OA系统': oa_year,
-            '营销平台': marketing_year,
-            'U8C': u8c_year
-        }
+    yield 'system_by_year_no_draft', ticket_store.system_counts_by_year(conn, no_draft)
     
     # 3. 按年度统计工单数量
-    year_counts = df['年份'].value_counts().sort_index()
-    year_stats = {
-        'labels': [str(int(year)) for year in year_counts.index if pd.notna(year)],
-        'data': [int(count) for year, count in year_counts.items() if pd.notna(year)]
-    }
+    yield 'year_stats', ticket_store.period_counts(conn, '年份')
     
     # 3.1 按年度统计工单数量（排除草稿）
-    year_counts_no_draft = df_no_draft['年份'].value_counts().sort_index()
-    year_stats_no_draft = {
-        'labels': [str(int(year)) for year in year_counts_no_draft.index if pd.notna(year)],
-        'data': [int(count) for year, count in year_counts_no_draft.items() if pd.notna(year)]
-    }
-    
-    # 4. 工单类型子类型统计
-    # 过滤掉空值和NaN值
-    df_filtered = df[df['工单类型子类型'].notna() & (df['工单类型子类型'] != '')]
-    type_counts = df_filtered['工单类型子类型'].value_counts()
-    type_stats = {
-        'labels': type_counts.index.tolist(),
-        'data': type_counts.values.tolist()
+    yield 'year_stats_no_draft', ticket_store.period_counts(conn, '年份', no_draft)
+    
+    # 4. 工单类型子类型统计（过滤掉空值）
+    has_type = "工单类型子类型 != ''"
+    yield 'type_stats', ticket_store.count_by(conn, '工单类型子类型', has_type)
+    
+    # 4.0 工单类型子类型统计（近似重复工单只计一次）
+    df_dedup_filtered = df_dedup[df_dedup['工单类型子类型'].notna() & (df_dedup['工单类型子类型'] != '')]
+    type_counts_dedup = df_dedup_filtered['工单类型子类型'].value_counts()
+    yield 'type_stats_dedup', {
+        'labels': type_counts_dedup.index.tolist(),
+        'data': type_counts_dedup.values.tolist()
     }
     
     # 4.1 按年度分组的工单类型子类型统计
-    type_by_year = {}
-    for year in df['年份'].dropna().unique():
-        year_data = df[df['年份'] == year]
-        # 过滤掉空值和NaN值
-        year_data_filtered = year_data[year_data['工单类型子类型'].notna() & (year_data['工单类型子类型'] != '')]
-        year_type_counts = year_data_filtered['工单类型子类型'].value_counts()
-        type_by_year[str(int(year))] = {
-            'labels': year_type_counts.index.tolist(),
-            'data': year_type_counts.values.tolist()
-        }
+    yield 'type_by_year', ticket_store.count_by_year(conn, '工单类型子类型', has_type)
     
     # 4.2 工单类型子类型统计（排除草稿）
-    # 过滤掉空值和NaN值
-    df_no_draft_filtered = df_no_draft[df_no_draft['工单类型子类型'].notna() & (df_no_draft['工单类型子类型'] != '')]
-    type_counts_no_draft = df_no_draft_filtered['工单类型子类型'].value_counts()
-    type_stats_no_draft = {
-        'labels': type_counts_no_draft.index.tolist(),
-        'data': type_counts_no_draft.values.tolist()
-    }
+    yield 'type_stats_no_draft', ticket_store.count_by(conn, '工单类型子类型', f'{has_type} AND {no_draft}')
     
     # 4.3 按年度分组的工单类型子类型统计（排除草稿）
-    type_by_year_no_draft = {}
-    for year in df_no_draft['年份'].dropna().unique():
-        year_data = df_no_draft[df_no_draft['年份'] == year]
-        # 过滤掉空值和NaN值
-        year_data_filtered = year_data[year_data['工单类型子类型'].notna() & (year_data['工单类型子类型'] != '')]
-        year_type_counts = year_data_filtered['工单类型子类型'].value_counts()
-        type_by_year_no_draft[str(int(year))] = {
-            'labels': year_type_counts.index.tolist(),
-            'data': year_type_counts.values.tolist()
-        }
+    yield 'type_by_year_no_draft', ticket_store.count_by_year(conn, '工单类型子类型', f'{has_type} AND {no_draft}')
     
     # 5. 工单状态统计
-    status_counts = df['流程状态'].value_counts()
-    status_stats = {
-        'labels': status_counts.index.tolist(),
-        'data': status_counts.values.tolist()
-    }
+    yield 'status_stats', ticket_store.count_by(conn, '流程状态')
     
     # 5.1 按年度分组的工单状态统计
-    status_by_year = {}
-    for year in df['年份'].dropna().unique():
-        year_data = df[df['年份'] == year]
-        year_status_counts = year_data['流程状态'].value_counts()
-        status_by_year[str(int(year))] = {
-            'labels': year_status_counts.index.tolist(),
-            'data': year_status_counts.values.tolist()
-        }
+    yield 'status_by_year', ticket_store.count_by_year(conn, '流程状态')
     
     # 5.2 审核状态统计
-    audit_counts = df['审核状态'].value_counts()
-    audit_stats = {
-        'labels': audit_counts.index.tolist(),
-        'data': audit_counts.values.tolist()
-    }
+    yield 'audit_stats', ticket_store.count_by(conn, '审核状态')
     
     # 5.3 按年度分组的审核状态统计
-    audit_by_year = {}
-    for year in df['年份'].dropna().unique():
-        year_data = df[df['年份'] == year]
-        year_audit_counts = year_data['审核状态'].value_counts()
-        audit_by_year[str(int(year))] = {
-            'labels': year_audit_counts.index.tolist(),
-            'data': year_audit_counts.values.tolist()
-        }
+    yield 'audit_by_year', ticket_store.count_by_year(conn, '审核状态')
     
     # 6. 月度趋势分析
-    df['年月'] = df['创建日期'].dt.to_period('M')
-    monthly_counts = df['年月'].value_counts().sort_index()
-    monthly_stats = {
-        'labels': [str(period) for period in monthly_counts.index if pd.notna(period)],
-        'data': [int(count) for period, count in monthly_counts.items() if pd.notna(period)]
-    }
+    yield 'monthly_stats', ticket_store.period_counts(conn, '年月')
     
     # 6.1 按年度分组的月度趋势分析
-    monthly_by_year = {}
-    for year in df['年份'].dropna().unique():
-        year_data = df[df['年份'] == year]
-        year_data['年月'] = year_data['创建日期'].dt.to_period('M')
-        year_monthly_counts = year_data['年月'].value_counts().sort_index()
-        monthly_by_year[str(int(year))] = {
-            'labels': [str(period) for period in year_monthly_counts.index if pd.notna(period)],
-            'data': [int(count) for period, count in year_monthly_counts.items() if pd.notna(period)]
-        }
+    yield 'monthly_by_year', ticket_store.monthly_by_year(conn)
     
     # 6.2 月度趋势分析（排除草稿）
-    df_no_draft['年月'] = df_no_draft['创建日期'].dt.to_period('M')
-    monthly_counts_no_draft = df_no_draft['年月'].value_counts().sort_index()
-    monthly_stats_no_draft = {
-        'labels': [str(period) for period in monthly_counts_no_draft.index if pd.notna(period)],
-        'data': [int(count) for period, count in monthly_counts_no_draft.items() if pd.notna(period)]
-    }
+    yield 'monthly_stats_no_draft', ticket_store.period_counts(conn, '年月', no_draft)
     
     # 6.3 按年度分组的月度趋势分析（排除草稿）
-    monthly_by_year_no_draft = {}
-    for year in df_no_draft['年份'].dropna().unique():
-        year_data = df_no_draft[df_no_draft['年份'] == year]
-        year_data['年月'] = year_data['创建日期'].dt.to_period('M')
-        year_monthly_counts = year_data['年月'].value_counts().sort_index()
-        monthly_by_year_no_draft[str(int(year))] = {
-            'labels': [str(period) for period in year_monthly_counts.index if pd.notna(period)],
-            'data': [int(count) for period, count in year_monthly_counts.items() if pd.notna(period)]
-        }
-    
-    # 提取未结束工单的详细信息
-    unfinished_tickets = df[df['流程状态'] == '未结束'][['流水号', '需求内容', '申请人', '所在部门', '创建日期', '工单类型', '审核状态']].copy()
-    unfinished_tickets['创建日期'] = unfinished_tickets['创建日期'].dt.strftime('%Y-%m-%d')
-    unfinished_tickets_list = unfinished_tickets.to_dict('records')
-    
-    # 按年度分组的未结束工单详细信息
-    unfinished_by_year = {}
-    for year in df['年份'].dropna().unique():
-        year_unfinished = df[(df['年份'] == year) & (df['流程状态'] == '未结束')][['流水号', '需求内容', '申请人', '所在部门', '创建日期', '工单类型', '审核状态']].copy()
-        year_unfinished['创建日期'] = year_unfinished['创建日期'].dt.strftime('%Y-%m-%d')
-        unfinished_by_year[str(int(year))] = year_unfinished.to_dict('records')
-    
-    # 汇总所有统计数据
-    result = {
-        'summary': {
-            'total_tickets': len(df),
-            'total_departments': df['所在部门'].nunique(),
-            'date_range': {
-                'start': df['创建日期'].min().strftime('%Y-%m-%d') if pd.notna(df['创建日期'].min()) else 'N/A',
-                'end': df['创建日期'].max().strftime('%Y-%m-%d') if pd.notna(df['创建日期'].max()) else 'N/A'
-            }
-        },
-        'dept_top10': dept_top10,
-        'dept_all': dept_all,  # 完整的部门统计
-        'original_dept_all': original_dept_all,  # 完整的原始部门统计
-        'dept_by_year': dept_by_year,
-        'dept_by_year_all': dept_by_year_all,  # 完整的年度部门统计
-        'original_dept_by_year_all': original_dept_by_year_all,  # 完整的年度原始部门统计
-        'dept_top10_no_draft': dept_top10_no_draft,
-        'dept_all_no_draft': dept_all_no_draft,  # 完整的部门统计（排除草稿）
-        'original_dept_all_no_draft': original_dept_all_no_draft,  # 完整的原始部门统计（排除草稿）
-        'dept_by_year_no_draft': dept_by_year_no_draft,
-        'dept_by_year_all_no_draft': dept_by_year_all_no_draft,  # 完整的年度部门统计（排除草稿）
-        'original_dept_by_year_all_no_draft': original_dept_by_year_all_no_draft,  # 完整的年度原始部门统计（排除草稿）
-        'system_stats': system_stats,
-        'system_by_year': system_by_year,
-        'system_stats_no_draft': system_stats_no_draft,
-        'system_by_year_no_draft': system_by_year_no_draft,
-        'year_stats': year_stats,
-        'year_stats_no_draft': year_stats_no_draft,
-        'type_stats': type_stats,
-        'type_by_year': type_by_year,
-        'type_stats_no_draft': type_stats_no_draft,
-        'type_by_year_no_draft': type_by_year_no_draft,
-        'status_stats': status_stats,
-        'status_by_year': status_by_year,
-        'audit_stats': audit_stats,
-        'audit_by_year': audit_by_year,
-        'monthly_stats': monthly_stats,
-        'monthly_by_year': monthly_by_year,
-        'monthly_stats_no_draft': monthly_stats_no_draft,
-        'monthly_by_year_no_draft': monthly_by_year_no_draft,
-        'unfinished_tickets': unfinished_tickets_list,
-        'unfinished_by_year': unfinished_by_year
+    yield 'monthly_by_year_no_draft', ticket_store.monthly_by_year(conn, no_draft)
+    
+    # 未结束工单的详细信息（全部及按年度分组）
+    yield 'unfinished_tickets', ticket_store.unfinished_tickets(conn)
+    yield 'unfinished_by_year', ticket_store.unfinished_by_year(conn)
+    
+    yield 'heavy_hitters', summarize_heavy_hitters(heavy_hitter_tracker)  # 各时间段Top申请人/子类型
+    yield 'heavy_hitters_no_draft', summarize_heavy_hitters(heavy_hitter_tracker, exclude_draft=True)
+    yield 'heavy_hitter_sketches', heavy_hitter_tracker.to_dict()
+    
+    yield 'near_duplicates', near_duplicate_report
+    yield 'minhash_signatures', minhash_signatures
+    
+    # 数据快照（用于不同导出之间的对比）
+    yield 'snapshot', build_snapshot(df, export_title)
+
+def build_snapshot(df, export_title):
+    """
+    生成数据快照：按 月份×一级部门×子类型×系统×草稿×流程状态 汇总的立方体，以及按流水号的工单状态
+    用于与其他导出的快照对比，而无需重新读取Excel
+    
+    Args:
+        df (DataFrame): 已映射一级部门并解析创建日期的工单数据
+        export_title (str): 导出文件的标题行，用于确定快照编号
+    
+    Returns:
+        dict: 快照数据
+    """
+    def text(value):
+        return None if pd.isna(value) or value == '' else str(value)
+    
+    months = df['创建日期'].dt.strftime('%Y-%m').fillna('')
+    keys = [
+        months,
+        df['一级部门'].fillna(''),
+        df['工单类型子类型'].fillna(''),
+        df['OA系统'] == '勾选',
+        df['营销平台'] == '勾选',
+        df['U8C'] == '勾选',
+        df['审核状态'] == '草稿',
+        df['流程状态'].fillna('')
+    ]
+    cube = [
+        [month, dept, ticket_type, int(oa), int(marketing), int(u8c), int(draft), status, int(count)]
+        for (month, dept, ticket_type, oa, marketing, u8c, draft, status), count
+        in df.groupby(keys).size().items()
+    ]
+    
+    created = df['创建日期'].dt.strftime('%Y-%m-%d')
+    tickets = {}
+    for serial, status, audit, dept, created_date, ticket_type in zip(
+            df['流水号'], df['流程状态'], df['审核状态'], df['一级部门'], created, df['工单类型子类型']):
+        tickets[str(serial)] = [text(status), text(audit), text(dept), text(created_date), text(ticket_type)]
+    
+    return {
+        'id': snapshot_id_from_title(export_title, datetime.now().strftime('%Y%m%d-%H%M%S')),
+        'export_title': text(export_title),
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'cube': cube,
+        'tickets': tickets
     }
+
+def process_ticket_data(excel_file, db_file=ticket_store.DB_FILE, workers=1):
+    """
+    处理需求工单数据
     
-    return result
+    Args:
+        excel_file (str): Excel文件路径
+        db_file (str): 工单数据库文件路径
+        workers (int): 解析Excel的进程数
+    
+    Returns:
+        dict: 处理后的数据
+    """
+    conn = ticket_store.connect(db_file)
+    try:
+        data = dict(iter_ticket_sections(excel_file, conn, workers))
+        conn.commit()
+        return data
+    finally:
+        conn.rollback()
+        conn.close()
 
-def save_data_for_web(data, output_file):
+# 不随网站数据下发、单独保存的段：键 -> 输出文件
+SIDE_OUTPUTS = {
+    'org_rollup': 'org_rollup.json',  # 供 /api/org 逐级查询
+    'heavy_hitter_sketches': 'heavy_hitters.json',  # 供 /api/stats/top 按部门和时间段合并查询
+    'bitmap_index': 'bitmap_index.json',  # 供 /api/stats/query 计算任意筛选组合
+    'minhash_signatures': near_duplicates.SIGNATURE_FILE,  # 下次处理时复用未变化工单的签名
+}
+
+def save_data_for_web(data, output_file, compact=False, batch=None):
     """
     保存数据为网站可用的JSON格式
     
     Args:
-        data (dict): 处理后的数据
+        data (dict 或 iterable): 处理后的数据，或 (键, 值) 段的迭代器
         output_file (str): 输出文件路径
+        compact (bool): 是否使用无缩进的紧凑格式
+        batch (OutputBatch): 指定时只写入临时文件，由batch.commit()统一替换
+    
+    Returns:
+        dict: 各段写入的字节数
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"数据已保存到 {output_file}")
+    sections = data.items() if isinstance(data, dict) else data
+    with StreamingJSONWriter(output_file, indent=None if compact else 2, batch=batch) as writer:
+        for key, value in sections:
+            writer.write_section(key, value)
+    print(f"数据已保存到 {output_file}（{writer.bytes_written / 1024:.1f} KB）")
+    return writer.section_sizes
+
+def stream_sections(sections, collected, batch):
+    """
+    将侧输出段写入各自的临时文件（加入batch），其余段原样传给网站数据写入，
+    同时保留打印统计信息所需的段；数据快照留到全部输出替换后再保存
+    """
+    for key, value in sections:
+        if key in SIDE_OUTPUTS:
+            save_data_for_web(value, SIDE_OUTPUTS[key], compact=True, batch=batch)
+            continue
+        if key == 'snapshot':
+            collected[key] = value
+            continue
+        if key in ('summary', 'system_stats'):
+            collected[key] = value
+        yield key, value
 
 if __name__ == "__main__":
-    # 处理数据
-    excel_file = "/Users/kangyiyuan/Desktop/AI编程项目/需求工单分析2/需求工单统计表.xlsx"
+    parser = argparse.ArgumentParser(description='需求工单数据处理')
+    parser.add_argument('excel_file', nargs='?',
+                        default="/Users/kangyiyuan/Desktop/AI编程项目/需求工单分析2/需求工单统计表.xlsx",
+                        help='Excel文件路径')
+    parser.add_argument('--compact', action='store_true', help='输出无缩进的紧凑JSON')
+    parser.add_argument('--db', default=ticket_store.DB_FILE, help='工单数据库文件路径')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='解析Excel的进程数，0表示使用全部CPU核（默认1，串行读取）')
+    args = parser.parse_args()
     
     print("正在处理需求工单数据...")
-    processed_data = process_ticket_data(excel_file)
     
-    # 保存为JSON文件供网站使用
-    save_data_for_web(processed_data, "ticket_data.json")
+    # 边计算边写入临时文件，全部成功后再统一替换，避免新旧输出混在一起
+    # 数据库写入同样在全部输出生成后才提交，失败时回滚，与恢复的备份工作簿保持一致
+    processed_data = {}
+    outputs = OutputBatch()
+    conn = ticket_store.connect(args.db)
+    try:
+        section_sizes = save_data_for_web(
+            stream_sections(iter_ticket_sections(args.excel_file, conn, args.workers or None),
+                            processed_data, outputs),
+            "ticket_data.json",
+            compact=args.compact,
+            batch=outputs
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        outputs.abort()
+        raise
+    finally:
+        conn.close()
+    outputs.commit()
+    print(f"数据快照已保存到 {save_snapshot(processed_data['snapshot'])}")
     
     # 打印基本统计信息
     print("\n=== 数据处理完成 ===")
@@ -517,4 +677,12 @@ if __name__ == "__main__":
     print(f"数据时间范围: {processed_data['summary']['date_range']['start']} 至 {processed_data['summary']['date_range']['end']}")
     print(f"\n各系统勾选统计:")
     for system, count in processed_data['system_stats'].items():
-        print(f"  {system}: {count} 个")
\ No newline at end of file
+        print(f"  {system}: {count} 个")
+    print(f"\n各段数据大小（前10）:")
+    print(format_section_sizes(section_sizes, limit=10))
+    
+    # 与上一份快照对比
+    diff = write_latest_diff()
+    if diff is not None:
+        print(f"\n与快照 {diff['base']} 对比: 新增 {diff['tickets']['counts']['added']} 条，"
+              f"关闭 {diff['tickets']['counts']['closed']} 条，结果已保存到 snapshot_diff.json")
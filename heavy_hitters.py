@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+申请人和工单类型子类型的Top-K统计
+按 字段 × 是否草稿 × 一级部门 × 半年度 划分互不重叠的Space-Saving统计，
+任意部门、年度或全部时间的Top-K由对应分区合并得到
+"""
+
+import os
+import json
+import threading
+
+from sketches import SpaceSaving
+
+# 跟踪的字段：接口参数名 -> 工单列名
+TRACKED_FIELDS = {
+    'applicant': '申请人',
+    'type': '工单类型子类型',
+}
+# 每个分区保留的计数器数量（越大误差越小）
+SKETCH_CAPACITY = 50
+# 默认返回的Top-K数量
+DEFAULT_TOP_K = 10
+# 表示全部部门/全部时间的查询值
+ALL = '全部'
+
+
+def half_year_of(date_value):
+    """
+    返回日期所在的半年度，例如 2024-08-01 -> "2024H2"，日期缺失时返回None
+    """
+    if date_value is None or date_value != date_value:  # NaT/NaN与自身不相等
+        return None
+    return f"{date_value.year}H{1 if date_value.month <= 6 else 2}"
+
+
+def period_matches(half_year, period):
+    """判断半年度是否属于查询的时间段（全部/年度/半年度）"""
+    if period in (None, '', ALL, 'all'):
+        return True
+    if half_year is None:
+        return False
+    if len(period) == 4:
+        return half_year[:4] == period
+    return half_year == period
+
+
+class HeavyHitterTracker:
+    """
+    在单次遍历工单时维护各分区的Top-K统计
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.sketches = {}  # (字段, 是否草稿, 部门, 半年度) -> SpaceSaving
+
+    def add(self, field, value, is_draft, dept, half_year):
+        if value is None or value != value or str(value).strip() == '':
+            return
+        key = (field, bool(is_draft), dept, half_year)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = SpaceSaving(self.capacity)
+        sketch.add(str(value).strip())
+
+    def merge(self, other):
+        """合并另一批数据（如另一份导出）的统计，返回新的统计对象"""
+        merged = HeavyHitterTracker(max(self.capacity, other.capacity))
+        for key in set(self.sketches) | set(other.sketches):
+            a, b = self.sketches.get(key), other.sketches.get(key)
+            merged.sketches[key] = a.merge(b) if a is not None and b is not None else (a or b)
+        return merged
+
+    def query(self, field, dept=ALL, period=ALL, exclude_draft=False, k=DEFAULT_TOP_K):
+        """
+        查询Top-K
+
+        Args:
+            field (str): 'applicant' 或 'type'
+            dept (str): 一级部门名称，'全部' 表示所有部门
+            period (str): '全部'、年度（如"2024"）或半年度（如"2024H2"）
+            exclude_draft (bool): 是否排除草稿
+            k (int): 返回数量
+
+        Returns:
+            dict: {'total': 分区内工单数, 'items': [{'name', 'count', 'error'}, ...]}
+        """
+        selected = []
+        for (f, is_draft, d, half_year), sketch in self.sketches.items():
+            if f != field or (exclude_draft and is_draft):
+                continue
+            if dept not in (None, '', ALL) and d != dept:
+                continue
+            if not period_matches(half_year, period):
+                continue
+            selected.append(sketch)
+        # 各分区互不重叠，一次性合并，避免逐个合并时误差累积
+        merged = SpaceSaving.merge_all(selected, self.capacity)
+        return {
+            'total': merged.total,
+            'items': [
+                {'name': name, 'count': count, 'error': error}
+                for name, count, error in merged.top(k)
+            ]
+        }
+
+    def periods(self):
+        """返回所有出现过的半年度（升序）"""
+        return sorted({key[3] for key in self.sketches if key[3] is not None})
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'sketches': [
+                [field, is_draft, dept, half_year, sketch.to_dict()]
+                for (field, is_draft, dept, half_year), sketch in self.sketches.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tracker = cls(data['capacity'])
+        for field, is_draft, dept, half_year, sketch in data['sketches']:
+            tracker.sketches[(field, is_draft, dept, half_year)] = SpaceSaving.from_dict(sketch)
+        return tracker
+
+
+def summarize_heavy_hitters(tracker, exclude_draft=False, k=DEFAULT_TOP_K):
+    """
+    生成全部部门在各时间段（全部、各年度、各半年度）的Top-K，用于网站数据
+    """
+    half_years = tracker.periods()
+    periods = [ALL] + sorted({h[:4] for h in half_years}) + half_years
+    return {
+        period: {
+            field: tracker.query(field, ALL, period, exclude_draft, k)['items']
+            for field in TRACKED_FIELDS
+        }
+        for period in periods
+    }
+
+
+class HeavyHitterIndex:
+    """
+    上传服务器使用的Top-K查询，从heavy_hitters.json加载并在文件更新后自动重新加载
+    """
+
+    def __init__(self, file_path):
+        self.file_path = str(file_path)
+        self.lock = threading.Lock()
+        self.mtime_ns = None
+        self.tracker = None
+
+    def get_tracker(self):
+        stat_result = os.stat(self.file_path)
+        with self.lock:
+            if self.mtime_ns != stat_result.st_mtime_ns:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    self.tracker = HeavyHitterTracker.from_dict(json.load(f))
+                self.mtime_ns = stat_result.st_mtime_ns
+            return self.tracker
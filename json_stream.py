@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式JSON写入
+按段写出顶层JSON对象，每段计算完成后立即写入临时文件，全部完成后原子替换目标文件
+"""
+
+import os
+import json
+import tempfile
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，缺失时使用标准库json
+    orjson = None
+
+
+class StreamingJSONWriter:
+    """
+    将 (键, 值) 段依次写成一个顶层JSON对象
+
+    用法：
+        with StreamingJSONWriter('ticket_data.json') as writer:
+            writer.write_section('summary', summary)
+    """
+
+    def __init__(self, output_file, indent=2, use_fast_encoder=True, batch=None):
+        self.output_file = str(output_file)
+        self.batch = batch  # 指定OutputBatch时，关闭后由其统一替换目标文件
+        self.indent = indent
+        self.use_fast_encoder = use_fast_encoder and orjson is not None
+        self.section_sizes = {}  # 键 -> 写入的字节数
+        self.bytes_written = 0
+        output_dir = os.path.dirname(os.path.abspath(self.output_file))
+        fd, self.temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=output_dir)
+        self.file = os.fdopen(fd, 'wb')
+        self._write(b'{')
+
+    def _write(self, chunk):
+        self.file.write(chunk)
+        self.bytes_written += len(chunk)
+
+    def _encode_chunks(self, value):
+        """将值编码为字节块，缩进模式下整体向右缩进一级"""
+        if self.use_fast_encoder:
+            try:
+                option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                if self.indent:
+                    option |= orjson.OPT_INDENT_2
+                encoded = orjson.dumps(value, option=option)
+                if self.indent:
+                    encoded = encoded.replace(b'\n', b'\n' + b' ' * self.indent)
+                yield encoded
+                return
+            except TypeError:
+                pass  # orjson不支持的类型回退到标准库
+
+        separators = (',', ': ') if self.indent else (',', ':')
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=self.indent, separators=separators)
+        prefix = '\n' + ' ' * self.indent if self.indent else None
+        for chunk in encoder.iterencode(value):
+            if prefix:
+                chunk = chunk.replace('\n', prefix)
+            yield chunk.encode('utf-8')
+
+    def write_section(self, key, value):
+        """写入一个顶层键值对"""
+        start = self.bytes_written
+        separator = b',' if self.section_sizes else b''
+        if self.indent:
+            separator += b'\n' + b' ' * self.indent
+        self._write(separator)
+        self._write(json.dumps(str(key), ensure_ascii=False).encode('utf-8'))
+        self._write(b': ' if self.indent else b':')
+        for chunk in self._encode_chunks(value):
+            self._write(chunk)
+        self.section_sizes[key] = self.section_sizes.get(key, 0) + self.bytes_written - start
+
+    def close(self):
+        """结束对象并原子替换目标文件（属于OutputBatch时等待其统一替换）"""
+        self._write(b'\n}' if self.indent and self.section_sizes else b'}')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.chmod(self.temp_path, 0o644)
+        if self.batch is not None:
+            self.batch.add(self.temp_path, self.output_file)
+        else:
+            os.replace(self.temp_path, self.output_file)
+
+    def abort(self):
+        """放弃写入并删除临时文件，目标文件保持不变"""
+        self.file.close()
+        try:
+            os.unlink(self.temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class OutputBatch:
+    """
+    一组相互关联的输出文件：各文件先完整写入临时文件，
+    全部生成成功后再依次替换目标文件，失败时删除临时文件，原有文件保持不变
+
+    用法：
+        batch = OutputBatch()
+        with StreamingJSONWriter('a.json', batch=batch) as writer: ...
+        with StreamingJSONWriter('b.json', batch=batch) as writer: ...
+        batch.commit()
+    """
+
+    def __init__(self):
+        self.pending = []  # [(临时文件, 目标文件), ...]
+
+    def add(self, temp_path, output_file):
+        self.pending.append((temp_path, output_file))
+
+    def commit(self):
+        """替换所有目标文件"""
+        for temp_path, output_file in self.pending:
+            os.replace(temp_path, output_file)
+        self.pending = []
+
+    def abort(self):
+        """删除尚未替换的临时文件"""
+        for temp_path, _ in self.pending:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+        self.pending = []
+
+
+def format_section_sizes(section_sizes, limit=None):
+    """将各段字节数格式化为便于打印的文本，按大小降序"""
+    ranked = sorted(section_sizes.items(), key=lambda kv: -kv[1])
+    if limit is not None:
+        ranked = ranked[:limit]
+    return '\n'.join(f"  {key}: {size / 1024:.1f} KB" for key, size in ranked)
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传服务器压力测试
+在临时目录中启动upload_server.py，按配置的比例并发请求静态文件并上传生成的测试工作簿，
+统计吞吐量、延迟分位数、错误率和服务器内存占用，并可保存基线用于对比
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from io import BytesIO
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# 启动服务器所需的文件（另外复制所有 .py 模块）
+SITE_FILES = [
+    'index.html', 'app.js', 'styles.css', 'details.html', 'ticket_data.json',
+    '启用组织.xlsx', '需求工单统计表.xlsx'
+]
+# 默认请求比例：请求名 -> 权重，upload表示上传生成的工作簿
+DEFAULT_MIX = 'index.html=5,app.js=5,ticket_data.json=3,upload=1'
+BASELINE_DIR = 'load_test_baselines'
+
+# 生成测试工作簿使用的取值
+DEPARTMENTS = ['销售管理部', '商务合同管理部', '北京财务部', '北京人力资源部', '项目管理二部', '北京采购部', '产品交付部']
+TICKET_TYPES = ['信息系统业务类', '信息系统技术类']
+SUB_TYPES = ['权限开通/关闭', '业务需求新增/变更', '基础数据修改', '表单修改', '数据提取/报表需求']
+AUDIT_STATES = ['已审核', '未审核', '草稿']
+FLOW_STATES = ['已结束', '未结束']
+HEADER = ['流水号', '申请人', '所在部门', '创建日期', '工单类型', '工单类型子类型', 'OA系统', '营销平台', 'U8C',
+          '需求内容', '审核状态_系统字段', '流程状态_系统字段']
+
+
+def generate_workbook(rows, seed=None):
+    """
+    生成与需求工单导出格式一致的工作簿（标题行、数据源行、表头行、数据行）
+
+    Returns:
+        bytes: xlsx文件内容
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('需求工单统计表')
+    sheet.append(['需求工单统计表'])
+    sheet.append([f"数据源：需求工单  执行时间：{datetime.now():%Y-%m-%d %H:%M:%S}"])
+    sheet.append(HEADER)
+    start = datetime(2022, 6, 1)
+    for i in range(rows):
+        created = start + timedelta(days=rng.randint(0, 1200))
+        sheet.append([
+            f"XXXQ{created:%Y%m%d}{i:04d}",
+            f"测试用户{rng.randint(1, 200)}",
+            rng.choice(DEPARTMENTS),
+            created.strftime('%Y-%m-%d'),
+            rng.choice(TICKET_TYPES),
+            rng.choice(SUB_TYPES),
+            rng.choice(['勾选', '未勾选']),
+            rng.choice(['勾选', '未勾选']),
+            rng.choice(['勾选', '未勾选']),
+            f"压力测试工单{i}的需求内容",
+            rng.choice(AUDIT_STATES),
+            rng.choice(FLOW_STATES)
+        ])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def build_multipart(filename, content):
+    """构造multipart/form-data请求体"""
+    boundary = f"----loadtest{random.getrandbits(64):016x}"
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n"
+    ).encode('utf-8') + content + f"\r\n--{boundary}--\r\n".encode('utf-8')
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def parse_mix(text):
+    """解析请求比例，例如 "index.html=5,upload=1" """
+    mix = []
+    for part in text.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name:
+            mix.append((name, float(weight or 1)))
+    return mix
+
+
+def percentile(values, pct):
+    """计算分位数（最近秩法）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def read_rss_kb(pid):
+    """读取进程常驻内存（KB），非Linux系统返回None"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ServerUnderTest:
+    """
+    在临时目录中复制站点文件并启动上传服务器，避免上传覆盖真实数据
+    """
+
+    def __init__(self, source_dir, port=None):
+        self.source_dir = Path(source_dir)
+        self.port = port or free_port()
+        self.work_dir = None
+        self.process = None
+
+    def start(self, timeout=10):
+        self.work_dir = Path(tempfile.mkdtemp(prefix='loadtest-'))
+        sources = list(self.source_dir.glob('*.py')) + [self.source_dir / name for name in SITE_FILES]
+        for source in sources:
+            if source.exists():
+                shutil.copy2(source, self.work_dir / source.name)
+        self.process = subprocess.Popen(
+            [sys.executable, 'upload_server.py', str(self.port)],
+            cwd=str(self.work_dir),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError("服务器启动超时")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+
+class LoadTest:
+    """
+    并发压测：每个工作线程按权重随机选择请求，直到达到时长或请求数上限
+    """
+
+    def __init__(self, host, port, mix, concurrency, duration=None, total_requests=None,
+                 upload_rows=500, accept_encoding=None, timeout=120, server_pid=None):
+        self.host = host
+        self.port = port
+        self.names = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.accept_encoding = accept_encoding
+        self.timeout = timeout
+        self.server_pid = server_pid
+        self.lock = threading.Lock()
+        self.issued = 0
+        self.results = {}  # 请求名 -> {'count', 'latencies', 'statuses', 'errors', 'bytes'}
+        self.rss_samples = []
+        self.upload_body = None
+        if 'upload' in self.names:
+            self.upload_body = build_multipart('loadtest.xlsx', generate_workbook(upload_rows, seed=0))
+
+    def next_request(self, rng):
+        """领取下一个请求，达到上限时返回None"""
+        with self.lock:
+            if self.total_requests is not None and self.issued >= self.total_requests:
+                return None
+            self.issued += 1
+        return rng.choices(self.names, weights=self.weights)[0]
+
+    def send(self, name):
+        """发送一个请求，返回 (状态码, 响应字节数)"""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            if name == 'upload':
+                body, content_type = self.upload_body
+                conn.request('POST', '/upload', body=body, headers={'Content-Type': content_type})
+            else:
+                headers = {'Accept-Encoding': self.accept_encoding} if self.accept_encoding else {}
+                conn.request('GET', '/' + name.lstrip('/'), headers=headers)
+            response = conn.getresponse()
+            return response.status, len(response.read())
+        finally:
+            conn.close()
+
+    def record(self, name, latency, status=None, size=0):
+        with self.lock:
+            stats = self.results.setdefault(
+                name, {'count': 0, 'latencies': [], 'statuses': {}, 'errors': 0, 'bytes': 0})
+            stats['count'] += 1
+            if status is None or status >= 400:
+                stats['errors'] += 1
+            if status is not None:
+                stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+                stats['latencies'].append(latency)
+                stats['bytes'] += size
+
+    def worker(self, deadline, seed):
+        rng = random.Random(seed)
+        while deadline is None or time.perf_counter() < deadline:
+            name = self.next_request(rng)
+            if name is None:
+                return
+            start = time.perf_counter()
+            try:
+                status, size = self.send(name)
+                self.record(name, time.perf_counter() - start, status, size)
+            except (OSError, http.client.HTTPException):
+                self.record(name, time.perf_counter() - start)
+
+    def sample_rss(self, stop_event):
+        while not stop_event.is_set():
+            rss = read_rss_kb(self.server_pid)
+            if rss is not None:
+                self.rss_samples.append(rss)
+            stop_event.wait(0.2)
+
+    def run(self):
+        stop_event = threading.Event()
+        sampler = None
+        if self.server_pid is not None:
+            sampler = threading.Thread(target=self.sample_rss, args=(stop_event,), daemon=True)
+            sampler.start()
+
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        threads = [threading.Thread(target=self.worker, args=(deadline, i)) for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stop_event.set()
+        if sampler is not None:
+            sampler.join()
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        def summarize(latencies, count, errors, size):
+            return {
+                'requests': count,
+                'errors': errors,
+                'error_rate': round(errors / count, 4) if count else 0,
+                'throughput': round(count / elapsed, 2) if elapsed else 0,
+                'bytes': size,
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            }
+
+        requests = {}
+        all_latencies, total, total_errors, total_bytes = [], 0, 0, 0
+        for name, stats in sorted(self.results.items()):
+            count = stats['count']
+            requests[name] = summarize(stats['latencies'], count, stats['errors'], stats['bytes'])
+            requests[name]['statuses'] = {str(code): n for code, n in sorted(stats['statuses'].items())}
+            all_latencies.extend(stats['latencies'])
+            total += count
+            total_errors += stats['errors']
+            total_bytes += stats['bytes']
+
+        return {
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'config': {
+                'mix': dict(zip(self.names, self.weights)),
+                'concurrency': self.concurrency,
+                'duration': self.duration,
+                'total_requests': self.total_requests,
+                'accept_encoding': self.accept_encoding
+            },
+            'elapsed_s': round(elapsed, 2),
+            'overall': summarize(all_latencies, total, total_errors, total_bytes),
+            'requests': requests,
+            'server_rss_kb': {
+                'max': max(self.rss_samples) if self.rss_samples else None,
+                'last': self.rss_samples[-1] if self.rss_samples else None
+            }
+        }
+
+
+def print_report(report):
+    overall = report['overall']
+    print(f"\n=== 压测结果（{report['elapsed_s']}s，并发{report['config']['concurrency']}） ===")
+    print(f"{'请求':<20}{'数量':>8}{'错误率':>8}{'吞吐/s':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}")
+    rows = list(report['requests'].items()) + [('总计', overall)]
+    for name, stats in rows:
+        print(f"{name:<20}{stats['requests']:>8}{stats['error_rate']:>8.2%}{stats['throughput']:>9}"
+              f"{str(stats['p50_ms']):>9}{str(stats['p95_ms']):>9}{str(stats['p99_ms']):>9}")
+    rss = report['server_rss_kb']
+    if rss['max'] is not None:
+        print(f"服务器内存: 峰值 {rss['max'] / 1024:.1f} MB，结束时 {rss['last'] / 1024:.1f} MB")
+
+
+def compare_with_baseline(report, baseline):
+    """打印与基线相比的吞吐量和延迟变化"""
+    print(f"\n=== 与基线对比（{baseline['time']}） ===")
+    names = sorted(set(report['requests']) | set(baseline['requests'])) + ['总计']
+    for name in names:
+        current = report['overall'] if name == '总计' else report['requests'].get(name)
+        base = baseline['overall'] if name == '总计' else baseline['requests'].get(name)
+        if not current or not base:
+            print(f"  {name}: 仅存在于{'本次' if current else '基线'}")
+            continue
+        parts = []
+        for key in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate'):
+            old, new = base.get(key), current.get(key)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+            parts.append(f"{key} {old} -> {new} ({change})")
+        print(f"  {name}: " + '; '.join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='上传服务器压力测试')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'请求比例，默认 {DEFAULT_MIX}')
+    parser.add_argument('--concurrency', type=int, default=20, help='并发数')
+    parser.add_argument('--duration', type=float, default=30, help='持续时间（秒）')
+    parser.add_argument('--requests', type=int, default=None, help='请求总数（设置后忽略持续时间）')
+    parser.add_argument('--upload-rows', type=int, default=500, help='生成的上传工作簿行数')
+    parser.add_argument('--gzip', action='store_true', help='静态文件请求携带Accept-Encoding: gzip, br')
+    parser.add_argument('--url', default=None, help='压测已运行的服务器（如 http://localhost:8001），不自动启动')
+    parser.add_argument('--save-baseline', metavar='NAME', help='将结果保存为基线')
+    parser.add_argument('--compare', metavar='NAME', help='与已保存的基线对比')
+    parser.add_argument('--output', help='将结果保存到JSON文件')
+    args = parser.parse_args()
+
+    source_dir = Path(__file__).parent
+    server = None
+    if args.url:
+        target = args.url.split('://', 1)[-1].rstrip('/')
+        host, _, port = target.partition(':')
+        port = int(port or 80)
+        server_pid = None
+    else:
+        server = ServerUnderTest(source_dir)
+        server.start()
+        host, port, server_pid = '127.0.0.1', server.port, server.process.pid
+        print(f"测试服务器已在临时目录启动，端口 {port}")
+
+    try:
+        test = LoadTest(
+            host, port, parse_mix(args.mix), args.concurrency,
+            duration=None if args.requests else args.duration,
+            total_requests=args.requests,
+            upload_rows=args.upload_rows,
+            accept_encoding='gzip, br' if args.gzip else None,
+            server_pid=server_pid
+        )
+        report = test.run()
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(source_dir / BASELINE_DIR / f'{args.compare}.json', 'r', encoding='utf-8') as f:
+            compare_with_baseline(report, json.load(f))
+    if args.save_baseline:
+        os.makedirs(source_dir / BASELINE_DIR, exist_ok=True)
+        with open(source_dir / BASELINE_DIR / f'{args.save_baseline}.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {BASELINE_DIR}/{args.save_baseline}.json")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+需求内容近似重复检测
+对需求内容的字符片段计算MinHash签名，用局部敏感哈希（LSH）分桶找出候选重复对，
+再按签名估计的相似度合并为重复簇，整体耗时近似线性
+"""
+
+import os
+import re
+import json
+import base64
+import hashlib
+
+import numpy as np
+
+# 签名长度 = 分段数 × 每段行数；相似度约 (1/BANDS)^(1/ROWS) 以上的文本对大概率成为候选
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+# 字符片段长度
+SHINGLE_SIZE = 3
+# 判定为重复的最低估计相似度（Jaccard）
+SIMILARITY_THRESHOLD = 0.8
+# 规范化后短于该长度的文本不参与检测（如"同上"、"见附件"）
+MIN_TEXT_LENGTH = 10
+# 哈希参数
+MERSENNE_PRIME = (1 << 31) - 1
+HASH_SEED = 20250814
+# 签名缓存文件，增量上传时只为新增或内容变化的工单计算签名
+SIGNATURE_FILE = 'minhash_signatures.json'
+
+_rng = np.random.RandomState(HASH_SEED)
+PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def normalize_text(text):
+    """去除空白和标点，统一大小写"""
+    if text is None or text != text:  # NaN
+        return ''
+    return re.sub(r'[\s\W_]+', '', str(text)).lower()
+
+
+def text_digest(normalized):
+    """规范化文本的摘要，用于判断缓存的签名是否仍然有效"""
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def shingle_hashes(normalized, size=SHINGLE_SIZE):
+    """字符片段的32位哈希集合"""
+    if len(normalized) <= size:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little') for g in grams],
+        dtype=np.uint64
+    )
+
+
+def minhash_signature(normalized):
+    """计算MinHash签名（NUM_PERM个32位整数）"""
+    hashes = shingle_hashes(normalized)
+    # (a·x + b) mod p，a、x均小于2^31，乘积不会溢出uint64
+    permuted = (PERM_A[:, None] * hashes[None, :] + PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def encode_signature(signature):
+    return base64.b64encode(signature.astype('<u4').tobytes()).decode('ascii')
+
+
+def decode_signature(text):
+    return np.frombuffer(base64.b64decode(text), dtype='<u4').astype(np.uint32)
+
+
+def load_signatures(file_path=SIGNATURE_FILE):
+    """
+    读取签名缓存，参数与当前配置不一致时视为无缓存
+
+    Returns:
+        dict: 流水号 -> (文本摘要, 签名)
+    """
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('params') != signature_params():
+        return {}
+    return {serial: (digest, decode_signature(sig)) for serial, (digest, sig) in data['signatures'].items()}
+
+
+def signature_params():
+    return {'num_perm': NUM_PERM, 'shingle_size': SHINGLE_SIZE, 'seed': HASH_SEED}
+
+
+def signatures_to_dict(signatures):
+    """转换为可保存的签名缓存"""
+    return {
+        'params': signature_params(),
+        'signatures': {serial: [digest, encode_signature(sig)] for serial, (digest, sig) in signatures.items()}
+    }
+
+
+def compute_signatures(serials, texts, cached=None):
+    """
+    计算各工单的签名，复用缓存中文本未变化的签名
+
+    Returns:
+        tuple: ({流水号: (文本摘要, 签名)}, 新计算的签名数)
+    """
+    cached = cached or {}
+    signatures = {}
+    computed = 0
+    for serial, text in zip(serials, texts):
+        normalized = normalize_text(text)
+        if len(normalized) < MIN_TEXT_LENGTH:
+            continue
+        digest = text_digest(normalized)
+        hit = cached.get(serial)
+        if hit is not None and hit[0] == digest:
+            signatures[serial] = hit
+        else:
+            signatures[serial] = (digest, minhash_signature(normalized))
+            computed += 1
+    return signatures, computed
+
+
+def find_clusters(signatures, threshold=SIMILARITY_THRESHOLD):
+    """
+    LSH分桶找出候选对，按签名一致比例估计相似度，合并为重复簇
+
+    Returns:
+        list: [{'members': [流水号, ...], 'similarity': 簇内候选对的最低估计相似度}]，按簇大小降序
+    """
+    serials = list(signatures)
+    if not serials:
+        return []
+    matrix = np.vstack([signatures[s][1] for s in serials])
+
+    parent = list(range(len(serials)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    matched = []  # (成员, 估计相似度)
+    for band in range(BANDS):
+        buckets = {}
+        block = matrix[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        for i, row in enumerate(block):
+            buckets.setdefault(row.tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # 已在同一簇中的成员无需再比较，每个簇只取一个代表
+            representatives = {}
+            for i in members:
+                representatives.setdefault(find(i), i)
+            pending = np.array(list(representatives.values()))
+            # 每轮以首个代表与其余代表做向量化比较，相似的并入同一簇，
+            # 不相似的留待下一轮，轮数不超过桶内形成的簇数
+            while len(pending) > 1:
+                first, rest = pending[0], pending[1:]
+                similarities = (matrix[rest] == matrix[first]).mean(axis=1)
+                similar = similarities >= threshold
+                for other, similarity in zip(rest[similar], similarities[similar]):
+                    parent[find(other)] = find(first)
+                    matched.append((first, float(similarity)))
+                pending = rest[~similar]
+
+    groups = {}
+    for i in range(len(serials)):
+        groups.setdefault(find(i), []).append(i)
+
+    root_similarity = {}
+    for first, similarity in matched:
+        root = find(first)
+        root_similarity[root] = min(similarity, root_similarity.get(root, 1.0))
+
+    clusters = [
+        {'members': sorted(serials[i] for i in members), 'similarity': round(root_similarity.get(root, 1.0), 3)}
+        for root, members in groups.items() if len(members) > 1
+    ]
+    clusters.sort(key=lambda c: (-len(c['members']), c['members'][0]))
+    return clusters
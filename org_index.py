@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+组织层级汇总索引
+按先序遍历（欧拉序）为组织树编号，使任意部门子树对应连续区间，
+子树内的工单统计即为前缀和之差
+"""
+
+import os
+import json
+import threading
+from itertools import accumulate
+
+# 虚拟根节点，挂载所有一级部门
+ROOT_CODE = 'ROOT'
+ROOT_NAME = '全部组织'
+# 组织结构中找不到的部门统一归入该节点
+UNMAPPED_CODE = 'UNMAPPED'
+UNMAPPED_NAME = '未匹配组织'
+
+
+def build_euler_index(org_nodes):
+    """
+    对组织树做先序遍历，生成带区间编号的节点列表
+
+    Args:
+        org_nodes (list): [(编码, 名称, 上级编码), ...]，上级编码为空表示一级部门
+
+    Returns:
+        list: 先序排列的节点字典，包含code/name/parent/depth/tin/tout，
+              子树对应的位置区间为 [tin, tout)
+    """
+    names = {}
+    children = {ROOT_CODE: []}
+    for code, name, parent in org_nodes:
+        if code in names or code in (ROOT_CODE, UNMAPPED_CODE):
+            continue
+        names[code] = name
+        children.setdefault(code, [])
+
+    for code, _, parent in org_nodes:
+        if code not in names:
+            continue
+        # 上级不存在或指向自身时视为一级部门
+        if not parent or parent not in names or parent == code:
+            parent = ROOT_CODE
+        if code not in children[parent]:
+            children[parent].append(code)
+
+    names[ROOT_CODE] = ROOT_NAME
+    names[UNMAPPED_CODE] = UNMAPPED_NAME
+    children[UNMAPPED_CODE] = []
+    children[ROOT_CODE].append(UNMAPPED_CODE)
+
+    nodes = []
+    visited = set()
+    # 使用显式栈避免组织层级过深时递归溢出
+    stack = [(ROOT_CODE, None, 0, False)]
+    positions = {}
+    while stack:
+        code, parent, depth, exiting = stack.pop()
+        if exiting:
+            nodes[positions[code]]['tout'] = len(nodes)
+            continue
+        if code in visited:
+            continue  # 组织数据中存在环时只保留第一次访问
+        visited.add(code)
+        positions[code] = len(nodes)
+        nodes.append({
+            'code': code,
+            'name': names[code],
+            'parent': parent,
+            'depth': depth,
+            'tin': len(nodes),
+            'tout': None
+        })
+        stack.append((code, parent, depth, True))
+        for child in reversed(children.get(code, [])):
+            stack.append((child, code, depth + 1, False))
+
+    # 环上无法从根到达的部门挂到根节点下，保证每个部门都有位置
+    for code in names:
+        if code not in visited:
+            positions[code] = len(nodes)
+            nodes.append({
+                'code': code,
+                'name': names[code],
+                'parent': ROOT_CODE,
+                'depth': 1,
+                'tin': len(nodes),
+                'tout': len(nodes) + 1
+            })
+    nodes[0]['tout'] = len(nodes)
+    return nodes
+
+
+class OrgRollupIndex:
+    """
+    组织层级汇总查询
+    从org_rollup.json加载各度量按位置的计数，构建前缀和后按区间求子树汇总；
+    文件更新后自动重新加载
+    """
+
+    def __init__(self, file_path):
+        self.file_path = str(file_path)
+        self.lock = threading.Lock()
+        self.mtime_ns = None
+        self.nodes = []
+        self.by_code = {}
+        self.children = {}
+        self.prefix = {}
+
+    def load(self):
+        """按文件修改时间按需加载索引"""
+        stat_result = os.stat(self.file_path)
+        with self.lock:
+            if self.mtime_ns == stat_result.st_mtime_ns:
+                return
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            nodes = data['nodes']
+            size = len(nodes)
+            prefix = {}
+            for measure, sparse in data['measures'].items():
+                counts = [0] * size
+                for position, count in sparse.items():
+                    counts[int(position)] = count
+                prefix[measure] = [0] + list(accumulate(counts))
+
+            children = {}
+            for node in nodes:
+                if node['parent'] is not None:
+                    children.setdefault(node['parent'], []).append(node['code'])
+
+            self.nodes = nodes
+            self.by_code = {node['code']: node for node in nodes}
+            self.children = children
+            self.prefix = prefix
+            self.mtime_ns = stat_result.st_mtime_ns
+
+    def subtree_totals(self, code):
+        """返回部门子树内各度量的汇总（区间求和）"""
+        node = self.by_code[code]
+        tin, tout = node['tin'], node['tout']
+        totals = {}
+        for measure, prefix in self.prefix.items():
+            value = prefix[tout] - prefix[tin]
+            if value:
+                totals[measure] = value
+        return totals
+
+    def node_view(self, code=ROOT_CODE):
+        """
+        返回部门节点及其直接下级的汇总，用于前端逐级展开
+
+        Returns:
+            dict: 节点信息；部门不存在时返回None
+        """
+        self.load()
+        with self.lock:
+            if code not in self.by_code:
+                return None
+            node = self.by_code[code]
+
+            path = []
+            current = node
+            while current is not None:
+                path.append({'code': current['code'], 'name': current['name']})
+                current = self.by_code.get(current['parent'])
+            path.reverse()
+
+            children = []
+            for child_code in self.children.get(code, []):
+                child = self.by_code[child_code]
+                totals = self.subtree_totals(child_code)
+                if not totals and child_code == UNMAPPED_CODE:
+                    continue
+                children.append({
+                    'code': child_code,
+                    'name': child['name'],
+                    'has_children': bool(self.children.get(child_code)),
+                    'totals': totals
+                })
+            children.sort(key=lambda c: -c['totals'].get('total', 0))
+
+            return {
+                'code': code,
+                'name': node['name'],
+                'depth': node['depth'],
+                'path': path,
+                'totals': self.subtree_totals(code),
+                'children': children
+            }
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+有界内存的流式统计结构
+包括水塘抽样、Space-Saving高频项统计和KMV基数估计，用于单次遍历大数据量的工作簿
+"""
+
+import random
+import hashlib
+import heapq
+
+
+class ReservoirSample:
+    """
+    水塘抽样（Algorithm R），在未知总量的数据流中等概率保留k个样本
+    """
+
+    def __init__(self, k, seed=None):
+        self.k = k
+        self.seen = 0
+        self.items = []
+        self.rng = random.Random(seed)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+            return
+        j = self.rng.randrange(self.seen)
+        if j < self.k:
+            self.items[j] = item
+
+
+class SpaceSaving:
+    """
+    Space-Saving高频项统计
+    最多保留capacity个计数器，每个计数器记录估计值和最大高估误差，
+    真实计数落在 [count - error, count] 之间
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}  # 项 -> 估计计数
+        self.errors = {}  # 项 -> 最大高估误差
+
+    def add(self, item, weight=1):
+        self.total += weight
+        if item in self.counts:
+            self.counts[item] += weight
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = weight
+            self.errors[item] = 0
+            return
+        # 替换当前计数最小的项，新项继承其计数作为误差
+        victim = min(self.counts, key=self.counts.get)
+        min_count = self.counts.pop(victim)
+        self.errors.pop(victim)
+        self.counts[item] = min_count + weight
+        self.errors[item] = min_count
+
+    def min_count(self):
+        """
+        计数器已满时返回最小计数（未被跟踪项的真实计数上限），否则为0
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """
+        合并另一个Space-Saving统计，返回新的统计结果
+        未被某一方跟踪的项按该方的最小计数补齐，误差同步累加，合并后仍满足误差上界
+        """
+        return SpaceSaving.merge_all([self, other])
+
+    @classmethod
+    def merge_all(cls, sketches, capacity=None):
+        """
+        一次性合并多个互不重叠的统计（k路合并），只在最后截断一次
+        被跟踪项的计数直接相加；只有计数器已满且未跟踪该项的统计才补上其最小计数，
+        避免逐个合并时每一步都把中间结果的最小计数叠加到新项上
+
+        Args:
+            sketches (iterable): SpaceSaving统计
+            capacity (int): 合并结果保留的计数器数量，默认取各统计的最大容量
+        """
+        sketches = list(sketches)
+        if capacity is None:
+            capacity = max((sketch.capacity for sketch in sketches), default=0)
+        merged = cls(capacity)
+        counts, errors = {}, {}
+        tracked_min = {}  # 项 -> 跟踪该项的已满统计的最小计数之和
+        full_min_total = 0
+        for sketch in sketches:
+            merged.total += sketch.total
+            sketch_min = sketch.min_count()
+            full_min_total += sketch_min
+            for item, count in sketch.counts.items():
+                counts[item] = counts.get(item, 0) + count
+                errors[item] = errors.get(item, 0) + sketch.errors[item]
+                if sketch_min:
+                    tracked_min[item] = tracked_min.get(item, 0) + sketch_min
+        for item in counts:
+            missing = full_min_total - tracked_min.get(item, 0)
+            counts[item] += missing
+            errors[item] += missing
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1], str(kv[0])))
+        for item, count in ranked[:capacity]:
+            merged.counts[item] = count
+            merged.errors[item] = errors[item]
+        return merged
+
+    def to_dict(self):
+        """序列化为可保存到JSON的字典"""
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'items': [[item, count, self.errors[item]] for item, count in self.counts.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从to_dict()的结果恢复"""
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        for item, count, error in data['items']:
+            sketch.counts[item] = count
+            sketch.errors[item] = error
+        return sketch
+
+    def top(self, k=None):
+        """
+        按估计计数降序返回 [(项, 估计计数, 误差), ...]
+        """
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], str(kv[0])))
+        if k is not None:
+            ranked = ranked[:k]
+        return [(item, count, self.errors[item]) for item, count in ranked]
+
+
+def _hash64(value):
+    """将任意值映射为稳定的64位整数哈希"""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class KMVCardinality:
+    """
+    KMV（k个最小哈希值）基数估计
+    不同值数量不超过k时结果是精确的，超过后相对误差约为 1/sqrt(k)
+    """
+
+    MAX_HASH = float(2 ** 64)
+
+    def __init__(self, k=1024):
+        self.k = k
+        self.heap = []  # 存储负哈希值，堆顶为当前保留的最大哈希
+        self.members = set()
+
+    def add(self, value):
+        h = _hash64(value)
+        if h in self.members:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, -h)
+            self.members.add(h)
+        elif h < -self.heap[0]:
+            evicted = -heapq.heapreplace(self.heap, -h)
+            self.members.discard(evicted)
+            self.members.add(h)
+
+    def estimate(self):
+        if len(self.heap) < self.k:
+            return len(self.heap)
+        kth = -self.heap[0]
+        return int((self.k - 1) * self.MAX_HASH / (kth + 1))
+
+    def is_exact(self):
+        return len(self.heap) < self.k
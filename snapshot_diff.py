@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据快照对比
+每次处理数据时保存一份快照（汇总立方体 + 按流水号的工单状态），
+对比两份快照得到新增/关闭工单以及各部门、系统、类型的变化，无需重新读取Excel
+"""
+
+import os
+import re
+import sys
+import json
+import threading
+
+# 快照保存目录
+SNAPSHOT_DIR = 'snapshots'
+# 最近一次处理生成的对比结果
+LATEST_DIFF_FILE = 'snapshot_diff.json'
+
+# 汇总立方体每行的字段：[月份, 一级部门, 工单类型子类型, OA系统, 营销平台, U8C, 是否草稿, 流程状态, 工单数]
+CUBE_FIELDS = ['month', 'dept', 'type', 'OA系统', '营销平台', 'U8C', 'draft', 'status', 'count']
+# 工单状态字段：流水号 -> [流程状态, 审核状态, 一级部门, 创建日期, 工单类型子类型]
+TICKET_FIELDS = ['status', 'audit', 'dept', 'created', 'type']
+SYSTEMS = ['OA系统', '营销平台', 'U8C']
+# 支持对比的维度
+DIMENSIONS = ['dept', 'system', 'type', 'status']
+# 每个维度返回的变化最大的条目数
+DEFAULT_TOP = 20
+
+
+def snapshot_id_from_title(title, fallback):
+    """
+    从导出文件标题行（如"数据源：需求工单  执行时间：2025-08-14 16:12:25"）提取快照编号
+    """
+    match = re.search(r'(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})', str(title or ''))
+    if not match:
+        return fallback
+    return '{}{}{}-{}{}{}'.format(*match.groups())
+
+
+def save_snapshot(snapshot, snapshot_dir=SNAPSHOT_DIR):
+    """保存快照，同一次导出重复处理时覆盖原文件"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = os.path.join(snapshot_dir, f"{snapshot['id']}.json")
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return path
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """返回所有快照编号（按时间升序）"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(name[:-5] for name in os.listdir(snapshot_dir) if name.endswith('.json'))
+
+
+def load_snapshot(snapshot_id, snapshot_dir=SNAPSHOT_DIR):
+    """读取快照，编号不存在时抛出FileNotFoundError"""
+    if not re.fullmatch(r'[\w\-]+', snapshot_id or ''):
+        raise FileNotFoundError(snapshot_id)
+    with open(os.path.join(snapshot_dir, f'{snapshot_id}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def period_of(month, granularity):
+    """将月份（YYYY-MM）转换为指定粒度的时间段"""
+    if not month:
+        return None
+    if granularity == 'year':
+        return month[:4]
+    if granularity == 'half':
+        return f"{month[:4]}H{1 if int(month[5:7]) <= 6 else 2}"
+    return month
+
+
+def cube_totals(cube, dimension, exclude_draft=False, granularity=None):
+    """
+    按维度汇总立方体
+
+    Returns:
+        dict: granularity为None时为 {维度值: 工单数}，否则为 {(时间段, 维度值): 工单数}
+    """
+    totals = {}
+    for month, dept, ticket_type, oa, marketing, u8c, draft, status, count in cube:
+        if exclude_draft and draft:
+            continue
+        if dimension == 'system':
+            values = [name for name, flag in zip(SYSTEMS, (oa, marketing, u8c)) if flag]
+        else:
+            value = {'dept': dept, 'type': ticket_type, 'status': status}[dimension]
+            values = [value] if value else []
+        for value in values:
+            key = value if granularity is None else (period_of(month, granularity), value)
+            totals[key] = totals.get(key, 0) + count
+    return totals
+
+
+def compare_counts(before, after, top=DEFAULT_TOP):
+    """
+    比较两组计数，按变化量绝对值降序返回
+    """
+    changes = []
+    for key in set(before) | set(after):
+        old, new = before.get(key, 0), after.get(key, 0)
+        if old == new:
+            continue
+        changes.append({
+            'name': key,
+            'before': old,
+            'after': new,
+            'delta': new - old,
+            'pct': round((new - old) / old * 100, 1) if old else None
+        })
+    changes.sort(key=lambda c: (-abs(c['delta']), str(c['name'])))
+    return changes[:top] if top else changes
+
+
+def diff_tickets(base_tickets, target_tickets, limit=None):
+    """
+    按流水号对比工单状态
+
+    Returns:
+        dict: 新增、删除、关闭、重新打开、审核状态变化、部门变化的工单
+    """
+    def ticket_view(serial, state):
+        view = dict(zip(TICKET_FIELDS, state))
+        view['serial'] = serial
+        return view
+
+    changes = {'added': [], 'removed': [], 'closed': [], 'reopened': [],
+               'audit_changed': [], 'dept_changed': []}
+    for serial, state in target_tickets.items():
+        old = base_tickets.get(serial)
+        if old is None:
+            changes['added'].append(ticket_view(serial, state))
+            continue
+        if old[0] != state[0]:
+            kind = 'closed' if state[0] == '已结束' else 'reopened' if old[0] == '已结束' else None
+            if kind:
+                changes[kind].append(ticket_view(serial, state))
+        if old[1] != state[1]:
+            changes['audit_changed'].append(dict(ticket_view(serial, state), audit_before=old[1]))
+        if old[2] != state[2]:
+            changes['dept_changed'].append(dict(ticket_view(serial, state), dept_before=old[2]))
+    for serial, state in base_tickets.items():
+        if serial not in target_tickets:
+            changes['removed'].append(ticket_view(serial, state))
+
+    result = {'counts': {kind: len(items) for kind, items in changes.items()}}
+    for kind, items in changes.items():
+        items.sort(key=lambda t: t['serial'], reverse=True)
+        result[kind] = items[:limit] if limit else items
+    return result
+
+
+def period_deltas(cube, dimension, granularity='half', exclude_draft=False, top=DEFAULT_TOP):
+    """
+    单份快照内的环比和同比：最近一个时间段对比上一时间段和去年同期
+    """
+    totals = cube_totals(cube, dimension, exclude_draft, granularity)
+    periods = sorted({period for period, _ in totals if period})
+    if not periods:
+        return {'period': None}
+
+    current = periods[-1]
+    previous = periods[-2] if len(periods) > 1 else None
+    last_year = str(int(current[:4]) - 1) + current[4:]
+
+    def period_counts(period):
+        return {value: count for (p, value), count in totals.items() if p == period}
+
+    current_counts = period_counts(current)
+    return {
+        'period': current,
+        'previous_period': previous,
+        'last_year_period': last_year if last_year in periods else None,
+        'period_over_period': compare_counts(period_counts(previous), current_counts, top) if previous else [],
+        'year_over_year': compare_counts(period_counts(last_year), current_counts, top) if last_year in periods else []
+    }
+
+
+def diff_snapshots(base, target, exclude_draft=False, granularity='half', top=DEFAULT_TOP, ticket_limit=200):
+    """
+    对比两份快照
+
+    Args:
+        base (dict): 较早的快照
+        target (dict): 较新的快照
+        exclude_draft (bool): 汇总对比是否排除草稿
+        granularity (str): 同比/环比的时间粒度：month/half/year
+        top (int): 每个维度返回的变化条目数
+        ticket_limit (int): 每类工单变化最多返回的条数
+
+    Returns:
+        dict: 对比结果
+    """
+    base_cube, target_cube = base['cube'], target['cube']
+    return {
+        'base': base['id'],
+        'target': target['id'],
+        'exclude_draft': exclude_draft,
+        'total': {
+            'before': sum(row[-1] for row in base_cube if not (exclude_draft and row[6])),
+            'after': sum(row[-1] for row in target_cube if not (exclude_draft and row[6]))
+        },
+        'tickets': diff_tickets(base['tickets'], target['tickets'], ticket_limit),
+        'dimensions': {
+            dimension: compare_counts(
+                cube_totals(base_cube, dimension, exclude_draft),
+                cube_totals(target_cube, dimension, exclude_draft),
+                top
+            )
+            for dimension in DIMENSIONS
+        },
+        'periods': {
+            dimension: period_deltas(target_cube, dimension, granularity, exclude_draft, top)
+            for dimension in DIMENSIONS
+        }
+    }
+
+
+class SnapshotStore:
+    """
+    上传服务器使用的快照读取，按文件修改时间缓存已加载的快照
+    """
+
+    def __init__(self, snapshot_dir, max_cached=4):
+        self.snapshot_dir = str(snapshot_dir)
+        self.max_cached = max_cached
+        self.lock = threading.Lock()
+        self.cache = {}  # 快照编号 -> (mtime_ns, 快照)
+
+    def list(self):
+        return list_snapshots(self.snapshot_dir)
+
+    def get(self, snapshot_id):
+        if not re.fullmatch(r'[\w\-]+', snapshot_id or ''):
+            raise FileNotFoundError(snapshot_id)
+        mtime_ns = os.stat(os.path.join(self.snapshot_dir, f'{snapshot_id}.json')).st_mtime_ns
+        with self.lock:
+            cached = self.cache.get(snapshot_id)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+        snapshot = load_snapshot(snapshot_id, self.snapshot_dir)
+        with self.lock:
+            if len(self.cache) >= self.max_cached:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[snapshot_id] = (mtime_ns, snapshot)
+        return snapshot
+
+
+def write_latest_diff(snapshot_dir=SNAPSHOT_DIR, output_file=LATEST_DIFF_FILE):
+    """
+    对比最近两份快照并保存结果，快照不足两份时返回None
+    """
+    snapshot_ids = list_snapshots(snapshot_dir)
+    if len(snapshot_ids) < 2:
+        return None
+    result = diff_snapshots(load_snapshot(snapshot_ids[-2], snapshot_dir),
+                            load_snapshot(snapshot_ids[-1], snapshot_dir))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    # 用法：python snapshot_diff.py [较早快照编号 较新快照编号]
+    snapshot_ids = list_snapshots()
+    if len(sys.argv) == 3:
+        base_id, target_id = sys.argv[1], sys.argv[2]
+    elif len(snapshot_ids) >= 2:
+        base_id, target_id = snapshot_ids[-2], snapshot_ids[-1]
+    else:
+        print("快照不足两份，无法对比")
+        sys.exit(1)
+
+    diff = diff_snapshots(load_snapshot(base_id), load_snapshot(target_id))
+    print(f"=== 快照对比: {base_id} -> {target_id} ===")
+    print(f"工单总数: {diff['total']['before']} -> {diff['total']['after']}")
+    for kind, count in diff['tickets']['counts'].items():
+        print(f"  {kind}: {count}")
+    print("\n部门变化（前10）:")
+    for change in diff['dimensions']['dept'][:10]:
+        print(f"  {change['name']}: {change['before']} -> {change['after']} ({change['delta']:+d})")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态文件缓存
+为上传服务器提供带内存LRU缓存、预压缩、条件请求和Range请求支持的静态文件服务
+"""
+
+import os
+import gzip
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，缺失时只提供gzip
+    brotli = None
+
+# 内存缓存的总字节上限
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# 超过该大小的文件不缓存原始内容，直接使用sendfile零拷贝发送
+INLINE_MAX_BYTES = 1024 * 1024
+# 小于该大小的文件压缩收益不大，不生成压缩版本
+COMPRESS_MIN_BYTES = 1024
+
+# 可压缩的文件类型（xlsx等本身已是压缩格式，不再压缩）
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.md'}
+
+
+class StaticEntry:
+    """
+    单个文件的缓存条目
+    """
+
+    def __init__(self, path, stat_result):
+        self.path = path
+        self.mtime_ns = stat_result.st_mtime_ns
+        self.size = stat_result.st_size
+        self.etag = f'"{self.mtime_ns:x}-{self.size:x}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.data = None  # 原始内容（大文件为None，走sendfile）
+        self.variants = {}  # 编码 -> 压缩后的内容
+
+    def matches(self, stat_result):
+        """判断缓存是否仍与磁盘文件一致"""
+        return stat_result.st_mtime_ns == self.mtime_ns and stat_result.st_size == self.size
+
+    def memory_size(self):
+        """缓存条目占用的字节数"""
+        total = len(self.data) if self.data is not None else 0
+        return total + sum(len(v) for v in self.variants.values())
+
+    def variant_etag(self, encoding):
+        """压缩版本使用独立的ETag"""
+        if encoding == 'identity':
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+def build_entry(path, stat_result=None):
+    """
+    读取文件并生成缓存条目（包括gzip/brotli预压缩版本）
+    """
+    if stat_result is None:
+        stat_result = os.stat(path)
+    entry = StaticEntry(path, stat_result)
+
+    ext = os.path.splitext(path)[1].lower()
+    compressible = ext in COMPRESSIBLE_EXTENSIONS and entry.size >= COMPRESS_MIN_BYTES
+    if entry.size > INLINE_MAX_BYTES and not compressible:
+        return entry
+
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    if entry.size <= INLINE_MAX_BYTES:
+        entry.data = content
+
+    if compressible:
+        entry.variants['gzip'] = gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            entry.variants['br'] = brotli.compress(content, quality=11)
+
+    return entry
+
+
+def parse_accept_encoding(header):
+    """
+    解析Accept-Encoding请求头，返回 编码 -> q值 的字典
+    """
+    accepted = {}
+    if not header:
+        return accepted
+    for part in header.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(entry, accept_encoding):
+    """
+    根据Accept-Encoding选择最合适的压缩版本，优先brotli
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding in ('br', 'gzip'):
+        if encoding not in entry.variants:
+            continue
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > 0:
+            return encoding
+    return 'identity'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    判断If-None-Match是否命中（弱比较）
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    target = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == target:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since, entry):
+    """
+    判断If-Modified-Since是否表示文件未修改
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    return int(entry.mtime_ns // 1_000_000_000) <= int(since.timestamp())
+
+
+def parse_range(range_header, size):
+    """
+    解析单段Range请求头
+
+    Returns:
+        (start, end) 闭区间；请求头无效或为多段时返回None；无法满足时返回 (None, None)
+    """
+    if not range_header or not range_header.startswith('bytes='):
+        return None
+    spec = range_header[6:].strip()
+    if ',' in spec:
+        return None  # 多段Range不支持，返回完整内容
+    start_str, sep, end_str = spec.partition('-')
+    if not sep:
+        return None
+    try:
+        if start_str == '':
+            # 后缀形式：bytes=-500 表示最后500字节
+            length = int(end_str)
+            if length <= 0:
+                return (None, None)
+            start = max(size - length, 0)
+            end = size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return (None, None)
+    return (start, min(end, size - 1))
+
+
+class StaticFileCache:
+    """
+    线程安全的静态文件LRU缓存，按文件mtime和大小自动失效
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """
+        获取文件的缓存条目，文件已变化或不在缓存中时重新加载
+        """
+        path = os.path.realpath(path)
+        stat_result = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry.matches(stat_result):
+                self.entries.move_to_end(path)
+                return entry
+
+        entry = build_entry(path, stat_result)
+        self._store(entry)
+        return entry
+
+    def warm(self, paths):
+        """
+        预先加载并压缩指定文件（在数据重新生成后调用）
+        """
+        for path in paths:
+            try:
+                self.get(path)
+            except OSError:
+                continue
+
+    def invalidate(self, path=None):
+        """清除指定文件或全部缓存"""
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                self.current_bytes = 0
+                return
+            entry = self.entries.pop(os.path.realpath(path), None)
+            if entry is not None:
+                self.current_bytes -= entry.memory_size()
+
+    def _store(self, entry):
+        """写入缓存并按LRU淘汰超出容量的条目"""
+        size = entry.memory_size()
+        with self.lock:
+            old = self.entries.pop(entry.path, None)
+            if old is not None:
+                self.current_bytes -= old.memory_size()
+            if size > self.max_bytes:
+                return
+            self.entries[entry.path] = entry
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= evicted.memory_size()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Top-K统计合并的回归测试
+运行：python -m unittest test_heavy_hitters
+"""
+
+import random
+import unittest
+from collections import Counter
+
+from sketches import SpaceSaving
+from heavy_hitters import HeavyHitterTracker, ALL
+
+
+class MergeAllTest(unittest.TestCase):
+
+    def build_partitions(self, partition_count=300, names_per_partition=30, capacity=50):
+        """生成互不重叠、均未满（即计数精确）的分区及真实计数"""
+        rng = random.Random(7)
+        pool = [f'申请人{i}' for i in range(500)]
+        truth = Counter()
+        tracker = HeavyHitterTracker(capacity)
+        for partition in range(partition_count):
+            dept = f'部门{partition}'
+            half_year = f'{2022 + partition % 4}H{1 + partition % 2}'
+            for name in rng.sample(pool, names_per_partition):
+                for _ in range(rng.randint(1, 5)):
+                    tracker.add('applicant', name, False, dept, half_year)
+                    truth[name] += 1
+        return tracker, truth
+
+    def test_exact_partitions_give_exact_totals(self):
+        tracker, truth = self.build_partitions()
+        self.assertTrue(all(s.min_count() == 0 for s in tracker.sketches.values()))
+
+        result = tracker.query('applicant', ALL, ALL, k=10)
+        expected = sorted(truth.items(), key=lambda kv: (-kv[1], kv[0]))[:10]
+        self.assertEqual([(i['name'], i['count']) for i in result['items']], expected)
+        self.assertTrue(all(i['error'] == 0 for i in result['items']))
+        self.assertEqual(result['total'], sum(truth.values()))
+
+    def test_full_partition_bound(self):
+        # 已满的分区只为未跟踪的项补上最小计数，真实计数始终落在 [count - error, count]
+        rng = random.Random(11)
+        streams = [[f'x{rng.randint(0, 40)}' for _ in range(400)] for _ in range(20)]
+        sketches = []
+        for stream in streams:
+            sketch = SpaceSaving(10)
+            for item in stream:
+                sketch.add(item)
+            sketches.append(sketch)
+        truth = Counter(item for stream in streams for item in stream)
+
+        merged = SpaceSaving.merge_all(sketches, 10)
+        for item, count, error in merged.top():
+            self.assertLessEqual(count - error, truth[item])
+            self.assertGreaterEqual(count, truth[item])
+
+    def test_pairwise_merge_matches_merge_all(self):
+        a, b = SpaceSaving(5), SpaceSaving(5)
+        for item in 'aaabbbcccdddeeeff':
+            a.add(item)
+        for item in 'ggghhhaaaz':
+            b.add(item)
+        self.assertEqual(a.merge(b).top(), SpaceSaving.merge_all([a, b]).top())
+
+
+if __name__ == '__main__':
+    unittest.main()
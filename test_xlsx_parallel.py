@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作簿并行解析的回归测试
+运行：python -m unittest test_xlsx_parallel
+"""
+
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import xlsx_parallel
+
+ORG_FILE = Path(__file__).parent / '启用组织.xlsx'
+
+
+class ReadExcelParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        # 测试文件很小，取消串行阈值以强制走并行路径
+        patcher = mock.patch.object(xlsx_parallel, 'MIN_PARALLEL_BYTES', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shared_strings_match_read_excel(self):
+        # 启用组织.xlsx 以共享字符串保存，与Excel另存的工作簿一致
+        result = xlsx_parallel.read_excel_parallel(ORG_FILE, workers=2)
+        pd.testing.assert_frame_equal(result, pd.read_excel(ORG_FILE))
+
+    def test_worker_failure_falls_back_to_read_excel(self):
+        with mock.patch.object(xlsx_parallel, 'assemble_rows', side_effect=IndexError('boom')):
+            result = xlsx_parallel.read_excel_parallel(ORG_FILE, workers=2)
+        pd.testing.assert_frame_equal(result, pd.read_excel(ORG_FILE))
+
+
+if __name__ == '__main__':
+    unittest.main()
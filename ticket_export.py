@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工单明细导出
+按看板的筛选条件（借助位图索引）逐行读取工作簿，并以CSV或XLSX格式边生成边输出，内存占用与行数无关
+"""
+
+import csv
+import io
+import zipfile
+from xml.sax.saxutils import escape
+
+from bitmap_index import iter_positions
+
+# 导出的列（与需求工单统计表一致）
+EXPORT_COLUMNS = [
+    '流水号', '申请人', '所在部门', '创建日期', '工单类型',
+    '工单类型子类型', 'OA系统', '营销平台', 'U8C',
+    '需求内容', '审核状态', '流程状态'
+]
+# 工作簿中数据行之前的行数（标题行、数据源行、表头行）
+HEADER_ROWS = 3
+# 输出缓冲大小，累积到该大小后再发送一个分块
+CHUNK_SIZE = 64 * 1024
+# 单个查询参数 -> 位图索引中的列
+PARAM_COLUMNS = {
+    'year': '年份',
+    'month': '月份',
+    'type': '工单类型子类型',
+    'ticket_type': '工单类型',
+    'status': '流程状态',
+    'audit': '审核状态',
+    'applicant': '申请人',
+}
+SYSTEM_COLUMNS = ['OA系统', '营销平台', 'U8C']
+
+
+class ExportFilterError(ValueError):
+    """导出筛选条件无效"""
+
+
+def build_export_bitmap(index, params):
+    """
+    将看板筛选参数转换为位图
+
+    Args:
+        index (BitmapIndex): 位图索引
+        params (dict): 查询参数（parse_qs的结果），支持 year, half（H1/H2或2024H2）, month,
+            dept（组织编码、一级部门或原始部门名称）, system, type, ticket_type, status, audit,
+            applicant, exclude_draft, filter（位图索引的筛选表达式）
+
+    Returns:
+        int: 匹配行的位图
+    """
+    bitmap = index.evaluate(params.get('filter', [''])[0])
+
+    for param, column in PARAM_COLUMNS.items():
+        values = [v for v in params.get(param, []) if v]
+        if values:
+            bitmap &= index.conjunction({column: values})
+
+    halves = [v for v in params.get('half', []) if v]
+    if halves:
+        union = 0
+        years = [v for v in params.get('year', []) if v]
+        for half in halves:
+            half = half.upper()
+            if len(half) == 2:  # 仅指定上/下半年时与年份组合
+                candidates = [f'{year}{half}' for year in years] or [
+                    value for value in index.columns.get('半年度', {}) if value.endswith(half)]
+            else:
+                candidates = [half]
+            for value in candidates:
+                union |= index.lookup('半年度', value)
+        bitmap &= union
+
+    depts = [v for v in params.get('dept', []) if v]
+    if depts:
+        union = 0
+        for dept in depts:
+            # 依次按组织编码（含下级）、一级部门、原始部门匹配
+            for column in ('组织', '一级部门', '所在部门'):
+                value_bitmap = index.columns.get(column, {}).get(dept)
+                if value_bitmap is not None:
+                    union |= value_bitmap
+                    break
+        bitmap &= union
+
+    systems = [v for v in params.get('system', []) if v]
+    if systems:
+        union = 0
+        for system in systems:
+            if system not in SYSTEM_COLUMNS:
+                raise ExportFilterError(f"未知的系统: {system}")
+            union |= index.lookup(system, '勾选')
+        bitmap &= union
+
+    if params.get('exclude_draft', ['0'])[0] in ('1', 'true'):
+        bitmap &= index.universe & ~index.lookup('审核状态', '草稿')
+
+    return bitmap
+
+
+def iter_workbook_rows(excel_file):
+    """
+    以只读流式方式逐行读取工作簿数据行（跳过流水号为空的行），
+    行序与数据处理时的行号一致
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        for row in sheet.iter_rows(min_row=HEADER_ROWS + 1, values_only=True):
+            row = list(row[:len(EXPORT_COLUMNS)]) + [None] * (len(EXPORT_COLUMNS) - len(row))
+            if row[0] is None or str(row[0]).strip() == '':
+                continue
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_selected_rows(excel_file, index, bitmap):
+    """
+    逐行输出位图选中的工作簿行
+
+    Raises:
+        RuntimeError: 工作簿与位图索引不一致（数据已更新但索引未重建）
+    """
+    positions = iter_positions(bitmap)
+    next_position = next(positions, None)
+    for position, row in enumerate(iter_workbook_rows(excel_file)):
+        if next_position is None:
+            return
+        if position < next_position:
+            continue
+        if index.row_keys and str(row[0]) != index.row_keys[position]:
+            raise RuntimeError(f"第{position + 1}行流水号与索引不一致，数据可能正在更新")
+        yield row
+        next_position = next(positions, None)
+
+
+def cell_text(value):
+    """将单元格值转换为导出文本"""
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+class ChunkBuffer(io.RawIOBase):
+    """
+    累积写入的字节，达到CHUNK_SIZE后交给send函数发送
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.send(bytes(self.buffer))
+            self.buffer.clear()
+
+
+def write_csv(rows, out):
+    """以UTF-8（带BOM，便于Excel打开）逐行写出CSV，返回行数"""
+    text = io.TextIOWrapper(out, encoding='utf-8-sig', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([cell_text(value) for value in row])
+        count += 1
+    text.flush()
+    text.detach()
+    return count
+
+
+# XLSX的固定部分
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="工单明细" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def xlsx_row(values):
+    """生成一行工作表XML（使用内联字符串，无需共享字符串表）"""
+    cells = ''.join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(cell_text(v))}</t></is></c>'
+        for v in values
+    )
+    return f'<row>{cells}</row>'
+
+
+def write_xlsx(rows, out):
+    """
+    逐行写出XLSX：工作表XML直接写入压缩流，ZIP使用数据描述符，无需回写文件头，返回行数
+    """
+    count = 0
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(xlsx_row(EXPORT_COLUMNS).encode('utf-8'))
+            for row in rows:
+                sheet.write(xlsx_row(row).encode('utf-8'))
+                count += 1
+            sheet.write(b'</sheetData></worksheet>')
+    return count
+
+
+# 导出格式 -> (写出函数, Content-Type, 扩展名)
+EXPORT_FORMATS = {
+    'csv': (write_csv, 'text/csv; charset=utf-8', 'csv'),
+    'xlsx': (write_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工单数据库
+以嵌入式SQLite保存全部工单和组织树，每次上传按流水号增量写入并记录最近一次出现的导出，
+网站统计数据由SQL查询最近一次导出中的工单（current_tickets视图）生成，与位图索引、组织汇总等
+基于同一工单集合；WAL模式下上传写入期间仍可并发读取
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# 数据库文件
+DB_FILE = 'tickets.db'
+
+# 工单字段（与需求工单统计表一致，另加一级部门）
+TICKET_COLUMNS = [
+    '流水号', '申请人', '所在部门', '一级部门', '创建日期', '工单类型',
+    '工单类型子类型', 'OA系统', '营销平台', 'U8C',
+    '需求内容', '审核状态', '流程状态'
+]
+SYSTEM_COLUMNS = ['OA系统', '营销平台', 'U8C']
+
+# last_seen为最近一次包含该工单的导出编号，统计只针对当前导出（store_meta.current_export）；
+# seq为工单在最近一次包含它的导出中的行号，统计结果数量相同时按其先后排列（与pandas的value_counts一致）
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    流水号 TEXT PRIMARY KEY,
+    申请人 TEXT,
+    所在部门 TEXT,
+    一级部门 TEXT,
+    组织编码 TEXT,
+    创建日期 TEXT,
+    年份 INTEGER,
+    年月 TEXT,
+    工单类型 TEXT,
+    工单类型子类型 TEXT,
+    OA系统 TEXT,
+    营销平台 TEXT,
+    U8C TEXT,
+    需求内容 TEXT,
+    审核状态 TEXT,
+    流程状态 TEXT,
+    seq INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    last_seen INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS org_units (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    parent TEXT,
+    depth INTEGER NOT NULL,
+    tin INTEGER NOT NULL,
+    tout INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 索引和视图在旧库补齐last_seen列之后再创建
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets(创建日期);
+CREATE INDEX IF NOT EXISTS idx_tickets_dept ON tickets(所在部门);
+CREATE INDEX IF NOT EXISTS idx_tickets_top_dept ON tickets(一级部门);
+CREATE INDEX IF NOT EXISTS idx_tickets_org ON tickets(组织编码);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(流程状态);
+CREATE INDEX IF NOT EXISTS idx_tickets_audit ON tickets(审核状态);
+CREATE INDEX IF NOT EXISTS idx_tickets_year ON tickets(年份, seq);
+CREATE INDEX IF NOT EXISTS idx_tickets_last_seen ON tickets(last_seen, seq);
+CREATE INDEX IF NOT EXISTS idx_org_units_tin ON org_units(tin);
+CREATE INDEX IF NOT EXISTS idx_org_units_name ON org_units(name);
+CREATE VIEW IF NOT EXISTS current_tickets AS
+    SELECT * FROM tickets
+    WHERE last_seen = (SELECT CAST(value AS INTEGER) FROM store_meta WHERE key = 'current_export');
+"""
+
+# 排除草稿的条件（审核状态为空的工单保留，与 df['审核状态'] != '草稿' 一致）
+NO_DRAFT = "审核状态 IS NOT '草稿'"
+
+
+def connect(db_file=DB_FILE):
+    """打开可写连接，启用WAL并确保表结构存在"""
+    conn = sqlite3.connect(str(db_file), timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(tickets)')}
+    if 'last_seen' not in columns:
+        conn.execute('ALTER TABLE tickets ADD COLUMN last_seen INTEGER NOT NULL DEFAULT 0')
+    conn.executescript(INDEXES)
+    return conn
+
+
+def connect_readonly(db_file=DB_FILE):
+    """
+    打开只读连接（query_only），可在线程间传递
+
+    Raises:
+        FileNotFoundError: 数据库尚未生成
+    """
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(str(db_file))
+    conn = sqlite3.connect(str(db_file), timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA query_only=ON')
+    return conn
+
+
+def text_or_none(value):
+    if value is None or pd.isna(value):
+        return None
+    return str(value)
+
+
+def upsert_tickets(conn, df, org_codes=None):
+    """
+    按流水号写入工单，已存在的工单整行更新，并将本次导出设为当前导出
+    不在本次导出中的工单保留在库中，但不再计入统计
+    不提交事务：由调用方在全部输出生成成功后提交，失败时回滚
+
+    Args:
+        conn: 可写连接
+        df (DataFrame): 已映射一级部门并解析创建日期的工单数据
+        org_codes (Series): 与df行对齐的组织编码
+
+    Returns:
+        dict: {'inserted': 新增数, 'updated': 更新数, 'current': 当前导出的工单数, 'total': 库中工单总数}
+    """
+    row = conn.execute("SELECT value FROM store_meta WHERE key = 'current_export'").fetchone()
+    export_id = int(row[0]) + 1 if row else 1
+    created = df['创建日期']
+    org_codes = org_codes if org_codes is not None else pd.Series([None] * len(df), index=df.index)
+    updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = []
+    for seq, (values, date, org_code) in enumerate(zip(
+            df[TICKET_COLUMNS].itertuples(index=False, name=None), created, org_codes)):
+        record = [text_or_none(v) for v in values]
+        has_date = pd.notna(date)
+        record[TICKET_COLUMNS.index('创建日期')] = date.strftime('%Y-%m-%d %H:%M:%S') if has_date else None
+        rows.append(record + [
+            text_or_none(org_code),
+            date.year if has_date else None,
+            date.strftime('%Y-%m') if has_date else None,
+            seq,
+            updated_at,
+            export_id
+        ])
+
+    columns = TICKET_COLUMNS + ['组织编码', '年份', '年月', 'seq', 'updated_at', 'last_seen']
+    assignments = ', '.join(f'{column} = excluded.{column}' for column in columns[1:])
+    sql = (f"INSERT INTO tickets ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+           f"ON CONFLICT(流水号) DO UPDATE SET {assignments}")
+
+    before = conn.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+    conn.executemany(sql, rows)
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('current_export', ?)",
+                 (str(export_id),))
+    total = conn.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+    current = conn.execute('SELECT COUNT(*) FROM current_tickets').fetchone()[0]
+    inserted = total - before
+    return {'inserted': inserted, 'updated': len(rows) - inserted, 'current': current, 'total': total}
+
+
+def replace_org_units(conn, nodes):
+    """用 build_euler_index() 的节点列表替换组织树（不提交事务，同 upsert_tickets）"""
+    conn.execute('DELETE FROM org_units')
+    conn.executemany(
+        'INSERT INTO org_units (code, name, parent, depth, tin, tout) VALUES (?, ?, ?, ?, ?, ?)',
+        [(n['code'], n['name'], n['parent'], n['depth'], n['tin'], n['tout']) for n in nodes]
+    )
+
+
+def join_conditions(*conditions):
+    return ' AND '.join(c for c in conditions if c)
+
+
+def where_clause(*conditions):
+    joined = join_conditions(*conditions)
+    return f'WHERE {joined}' if joined else ''
+
+
+def count_by(conn, column, condition=None, args=(), limit=None):
+    """
+    按列分组计数，数量降序，数量相同时按首次出现的行号排列
+
+    Returns:
+        dict: {'labels': [...], 'data': [...]}
+    """
+    sql = (f"SELECT {column}, COUNT(*) FROM current_tickets {where_clause(f'{column} IS NOT NULL', condition)} "
+           f"GROUP BY {column} ORDER BY COUNT(*) DESC, MIN(seq)")
+    if limit:
+        sql += f' LIMIT {int(limit)}'
+    rows = conn.execute(sql, args).fetchall()
+    return {'labels': [row[0] for row in rows], 'data': [row[1] for row in rows]}
+
+
+def years(conn, condition=None):
+    """有工单的年份，按首次出现的行号排列"""
+    sql = (f"SELECT 年份 FROM current_tickets {where_clause('年份 IS NOT NULL', condition)} "
+           f"GROUP BY 年份 ORDER BY MIN(seq)")
+    return [row[0] for row in conn.execute(sql)]
+
+
+def count_by_year(conn, column, condition=None, limit=None):
+    """各年份内按列分组计数，返回 {年份: {'labels': [...], 'data': [...]}}"""
+    return {
+        str(year): count_by(conn, column, join_conditions(condition, '年份 = ?'), (year,), limit)
+        for year in years(conn, condition)
+    }
+
+
+def system_counts(conn, condition=None, args=()):
+    """各系统勾选的工单数"""
+    selects = ', '.join(f"COUNT(CASE WHEN {column} = '勾选' THEN 1 END)" for column in SYSTEM_COLUMNS)
+    row = conn.execute(f'SELECT {selects} FROM current_tickets {where_clause(condition)}', args).fetchone()
+    return dict(zip(SYSTEM_COLUMNS, row))
+
+
+def system_counts_by_year(conn, condition=None):
+    return {
+        str(year): system_counts(conn, join_conditions(condition, '年份 = ?'), (year,))
+        for year in years(conn, condition)
+    }
+
+
+def period_counts(conn, column, condition=None, args=()):
+    """按时间段（年份或年月）升序计数"""
+    sql = (f"SELECT {column}, COUNT(*) FROM current_tickets {where_clause(f'{column} IS NOT NULL', condition)} "
+           f"GROUP BY {column} ORDER BY {column}")
+    rows = conn.execute(sql, args).fetchall()
+    return {'labels': [str(row[0]) for row in rows], 'data': [row[1] for row in rows]}
+
+
+def monthly_by_year(conn, condition=None):
+    return {
+        str(year): period_counts(conn, '年月', join_conditions(condition, '年份 = ?'), (year,))
+        for year in years(conn, condition)
+    }
+
+
+def summary(conn):
+    total, departments, start, end = conn.execute(
+        'SELECT COUNT(*), COUNT(DISTINCT 所在部门), MIN(创建日期), MAX(创建日期) FROM current_tickets'
+    ).fetchone()
+    return {
+        'total_tickets': total,
+        'total_departments': departments,
+        'date_range': {
+            'start': start[:10] if start else 'N/A',
+            'end': end[:10] if end else 'N/A'
+        }
+    }
+
+
+# 未结束工单明细的字段
+UNFINISHED_FIELDS = ['流水号', '需求内容', '申请人', '所在部门', '创建日期', '工单类型', '审核状态']
+
+
+def unfinished_tickets(conn, year=None):
+    """未结束工单明细，按行号排列"""
+    condition, args = "流程状态 = '未结束'", ()
+    if year is not None:
+        condition, args = condition + ' AND 年份 = ?', (year,)
+    fields = ', '.join('substr(创建日期, 1, 10)' if f == '创建日期' else f for f in UNFINISHED_FIELDS)
+    rows = conn.execute(f'SELECT {fields} FROM current_tickets WHERE {condition} ORDER BY seq', args)
+    return [dict(zip(UNFINISHED_FIELDS, row)) for row in rows]
+
+
+def unfinished_by_year(conn):
+    return {str(year): unfinished_tickets(conn, year) for year in years(conn)}
+
+
+class TicketQueryError(ValueError):
+    """工单查询参数无效"""
+
+
+# 查询参数 -> 等值匹配的列
+QUERY_COLUMNS = {
+    'year': '年份',
+    'month': '年月',
+    'top_dept': '一级部门',
+    'raw_dept': '所在部门',
+    'type': '工单类型子类型',
+    'ticket_type': '工单类型',
+    'status': '流程状态',
+    'audit': '审核状态',
+    'applicant': '申请人',
+}
+# 允许分组的列
+GROUP_COLUMNS = ['一级部门', '所在部门', '组织编码', '申请人', '工单类型', '工单类型子类型',
+                 '审核状态', '流程状态', '年份', '年月'] + SYSTEM_COLUMNS
+# 明细查询返回的字段
+DETAIL_FIELDS = ['流水号', '申请人', '所在部门', '一级部门', '创建日期', '工单类型', '工单类型子类型',
+                 'OA系统', '营销平台', 'U8C', '需求内容', '审核状态', '流程状态']
+MAX_LIMIT = 1000
+
+
+def build_ticket_filter(params):
+    """
+    将查询参数（parse_qs的结果）转换为SQL条件
+
+    支持：year, month, top_dept, raw_dept, type, ticket_type, status, audit, applicant（同一参数多个取值为OR），
+    org（组织编码，含全部下级）, system（OA系统/营销平台/U8C）, start/end（创建日期范围，YYYY-MM-DD），
+    q（需求内容关键字）, exclude_draft=1
+
+    Returns:
+        tuple: (条件SQL, 参数列表)
+    """
+    conditions, args = [], []
+    for param, column in QUERY_COLUMNS.items():
+        values = [v for v in params.get(param, []) if v]
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            args.extend(values)
+
+    orgs = [v for v in params.get('org', []) if v]
+    if orgs:
+        conditions.append(
+            "组织编码 IN (SELECT child.code FROM org_units parent JOIN org_units child "
+            "ON child.tin >= parent.tin AND child.tin < parent.tout "
+            f"WHERE parent.code IN ({', '.join('?' * len(orgs))}))"
+        )
+        args.extend(orgs)
+
+    systems = [v for v in params.get('system', []) if v]
+    if systems:
+        unknown = [s for s in systems if s not in SYSTEM_COLUMNS]
+        if unknown:
+            raise TicketQueryError(f"未知的系统: {unknown[0]}")
+        conditions.append('(' + ' OR '.join(f"{s} = '勾选'" for s in systems) + ')')
+
+    for param, operator, suffix in (('start', '>=', ''), ('end', '<=', ' 23:59:59')):
+        value = params.get(param, [''])[0]
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise TicketQueryError(f"无效的日期: {value}")
+            conditions.append(f'创建日期 {operator} ?')
+            args.append(value + suffix)
+
+    keyword = params.get('q', [''])[0]
+    if keyword:
+        conditions.append("需求内容 LIKE ? ESCAPE '\\'")
+        args.append('%' + keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+
+    if params.get('exclude_draft', ['0'])[0] in ('1', 'true'):
+        conditions.append(NO_DRAFT)
+
+    return ' AND '.join(conditions), args
+
+
+def query_tickets(conn, params):
+    """
+    工单即席查询：返回匹配数量，以及分组统计（group_by）或分页明细（limit/offset）
+    """
+    condition, args = build_ticket_filter(params)
+    where = where_clause(condition)
+    result = {'count': conn.execute(f'SELECT COUNT(*) FROM current_tickets {where}', args).fetchone()[0]}
+
+    group_by = params.get('group_by', [''])[0]
+    if group_by:
+        if group_by not in GROUP_COLUMNS:
+            raise TicketQueryError(f"不支持的分组列: {group_by}")
+        groups = count_by(conn, group_by, condition, args)
+        result['group_by'] = group_by
+        result['groups'] = [{'value': value, 'count': count}
+                            for value, count in zip(groups['labels'], groups['data'])]
+        return result
+
+    try:
+        limit = min(max(int(params.get('limit', ['50'])[0]), 0), MAX_LIMIT)
+        offset = max(int(params.get('offset', ['0'])[0]), 0)
+    except ValueError:
+        raise TicketQueryError("无效的limit或offset")
+    rows = conn.execute(
+        f"SELECT {', '.join(DETAIL_FIELDS)} FROM current_tickets {where} "
+        f"ORDER BY 创建日期 DESC, 流水号 DESC LIMIT ? OFFSET ?",
+        args + [limit, offset]
+    )
+    result['tickets'] = [dict(zip(DETAIL_FIELDS, row)) for row in rows]
+    result['limit'], result['offset'] = limit, offset
+    return result
+
+
+class ReadConnectionPool:
+    """
+    上传服务器使用的只读连接池，连接按需创建并复用，
+    WAL模式下读取不受data_processor写入的阻塞
+    """
+
+    def __init__(self, db_file, size=4, timeout=10):
+        self.db_file = str(db_file)
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+
+    @contextmanager
+    def connection(self):
+        """
+        借出一个连接，用完自动归还
+
+        Raises:
+            FileNotFoundError: 数据库尚未生成
+            TimeoutError: 所有连接都在使用中且等待超时
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle.put(conn)
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.created < self.size:
+                conn = connect_readonly(self.db_file)
+                self.created += 1
+                return conn
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("数据库连接繁忙，请稍后再试")
@@ -4,14 +4,54 @@
 import os
 import json
 import shutil
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote, quote
 import cgi
 import tempfile
 import subprocess
 import sys
+import threading
 from pathlib import Path
 
+from static_cache import (
+    StaticFileCache, choose_encoding, etag_matches, not_modified_since, parse_range
+)
+from org_index import OrgRollupIndex, ROOT_CODE
+from heavy_hitters import HeavyHitterIndex, TRACKED_FIELDS, DEFAULT_TOP_K, ALL
+from bitmap_index import BitmapIndexStore, FilterSyntaxError
+from ticket_export import (
+    EXPORT_FORMATS, ExportFilterError, ChunkBuffer, build_export_bitmap, iter_selected_rows
+)
+from snapshot_diff import SnapshotStore, diff_snapshots, SNAPSHOT_DIR, DEFAULT_TOP
+from ticket_store import ReadConnectionPool, TicketQueryError, query_tickets, DB_FILE
+
+# 静态文件缓存（进程内共享）
+static_cache = StaticFileCache()
+
+# 组织层级汇总索引（由data_processor.py生成org_rollup.json）
+org_index = OrgRollupIndex(Path(__file__).parent / "org_rollup.json")
+
+# 申请人/工单类型子类型Top-K统计（由data_processor.py生成heavy_hitters.json）
+heavy_hitter_index = HeavyHitterIndex(Path(__file__).parent / "heavy_hitters.json")
+
+# 工单位图索引（由data_processor.py生成bitmap_index.json）
+bitmap_store = BitmapIndexStore(Path(__file__).parent / "bitmap_index.json")
+
+# 历次导出的数据快照（由data_processor.py保存在snapshots目录）
+snapshot_store = SnapshotStore(Path(__file__).parent / SNAPSHOT_DIR)
+
+# 工单数据库只读连接池（由data_processor.py写入tickets.db）
+ticket_db_pool = ReadConnectionPool(Path(__file__).parent / DB_FILE)
+
+# 重新生成数据时解析Excel的进程数（按CPU核数并行）
+PARSE_WORKERS = os.cpu_count() or 1
+
+# 上传会替换工作簿并重新生成数据，多线程下同一时间只处理一个上传
+upload_lock = threading.Lock()
+
+# 数据重新生成后需要预热的文件
+WARM_FILES = ['index.html', 'app.js', 'styles.css', 'details.html', 'ticket_data.json']
+
 class UploadHandler(BaseHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         self.upload_dir = Path(__file__).parent
@@ -22,8 +62,8 @@ class UploadHandler(BaseHTTPRequestHandler):
         """处理预检请求"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Methods', 'POST, GET, HEAD, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Range, If-None-Match')
         self.end_headers()
     
     def do_POST(self):
@@ -38,42 +78,347 @@ class UploadHandler(BaseHTTPRequestHandler):
             self.send_json_response({'success': False, 'message': str(e)}, 500)
     
     def do_GET(self):
-        """处理GET请求 - 提供静态文件服务"""
+        """处理GET请求 - 提供API查询和静态文件服务"""
         try:
-            # 解析URL路径
             parsed_path = urlparse(self.path)
-            file_path = parsed_path.path.lstrip('/')
-            
-            # 如果是根路径，返回index.html
-            if not file_path or file_path == '/':
-                file_path = 'index.html'
-            
-            # 构建完整文件路径
-            full_path = self.upload_dir / file_path
-            
-            # 检查文件是否存在
-            if not full_path.exists() or not full_path.is_file():
-                self.send_error(404, "File not found")
-                return
-            
-            # 确定MIME类型
-            content_type = self.get_content_type(file_path)
-            
-            # 读取并发送文件
-            with open(full_path, 'rb') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', content_type)
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(content)
-            
+            if parsed_path.path.startswith('/api/'):
+                self.handle_api_request(parsed_path)
+            else:
+                self.serve_static_file()
         except Exception as e:
             print(f"处理GET请求时出错: {e}")
             self.send_error(500, "Internal Server Error")
     
+    def do_HEAD(self):
+        """处理HEAD请求"""
+        try:
+            self.serve_static_file(head_only=True)
+        except Exception as e:
+            print(f"处理HEAD请求时出错: {e}")
+            self.send_error(500, "Internal Server Error")
+    
+    def handle_api_request(self, parsed_path):
+        """处理GET形式的API查询"""
+        path = parsed_path.path
+        if path == '/api/org' or path.startswith('/api/org/'):
+            self.handle_org_request(unquote(path[len('/api/org'):]).strip('/') or ROOT_CODE)
+        elif path == '/api/stats/top':
+            self.handle_top_request(parse_qs(parsed_path.query))
+        elif path == '/api/stats/query':
+            self.handle_query_request(parse_qs(parsed_path.query))
+        elif path == '/api/stats/columns':
+            self.handle_columns_request()
+        elif path == '/api/export':
+            self.handle_export_request(parse_qs(parsed_path.query))
+        elif path == '/api/snapshots':
+            self.send_json_response({'success': True, 'data': snapshot_store.list()})
+        elif path == '/api/diff':
+            self.handle_diff_request(parse_qs(parsed_path.query))
+        elif path == '/api/tickets':
+            self.handle_tickets_request(parse_qs(parsed_path.query))
+        else:
+            self.send_json_response({'success': False, 'message': '未知的API'}, 404)
+    
+    def handle_org_request(self, code):
+        """
+        组织层级下钻查询
+        返回部门子树的汇总及其直接下级，前端逐级展开时按需请求
+        """
+        try:
+            view = org_index.node_view(code)
+        except FileNotFoundError:
+            self.send_json_response({'success': False, 'message': '组织汇总数据不存在，请先上传数据'}, 404)
+            return
+        
+        if view is None:
+            self.send_json_response({'success': False, 'message': f'部门编码不存在: {code}'}, 404)
+            return
+        
+        self.send_json_response({'success': True, 'data': view})
+    
+    def handle_top_request(self, params):
+        """
+        Top-K查询
+        参数：field=applicant|type, dept=一级部门, period=全部|2024|2024H2, exclude_draft=1, k=10
+        """
+        field = params.get('field', ['applicant'])[0]
+        if field not in TRACKED_FIELDS:
+            self.send_json_response({'success': False, 'message': f'不支持的字段: {field}'}, 400)
+            return
+        try:
+            k = int(params.get('k', [DEFAULT_TOP_K])[0])
+        except ValueError:
+            self.send_json_response({'success': False, 'message': '无效的k值'}, 400)
+            return
+        
+        try:
+            tracker = heavy_hitter_index.get_tracker()
+        except FileNotFoundError:
+            self.send_json_response({'success': False, 'message': 'Top-K统计数据不存在，请先上传数据'}, 404)
+            return
+        
+        dept = params.get('dept', [ALL])[0]
+        period = params.get('period', [ALL])[0]
+        exclude_draft = params.get('exclude_draft', ['0'])[0] in ('1', 'true')
+        result = tracker.query(field, dept, period, exclude_draft, max(1, min(k, tracker.capacity)))
+        result.update({'field': field, 'dept': dept, 'period': period, 'exclude_draft': exclude_draft})
+        self.send_json_response({'success': True, 'data': result})
+    
+    def get_bitmap_index(self):
+        """读取位图索引，数据不存在时发送404并返回None"""
+        try:
+            return bitmap_store.get_index()
+        except FileNotFoundError:
+            self.send_json_response({'success': False, 'message': '位图索引不存在，请先上传数据'}, 404)
+            return None
+    
+    def handle_query_request(self, params):
+        """
+        任意筛选组合的计数和分组统计
+        参数：filter=筛选表达式（如 "U8C=勾选 AND 流程状态=未结束 AND 半年度=2024H2"），
+        group_by=分组列，其余参数按 列名=取值 处理（同列多个取值为OR，不同列为AND）
+        """
+        index = self.get_bitmap_index()
+        if index is None:
+            return
+        
+        expression = params.pop('filter', [''])[0]
+        group_by = params.pop('group_by', [None])[0]
+        try:
+            bitmap = index.evaluate(expression) & index.conjunction(params)
+            result = {'filter': expression, 'conditions': params, 'count': index.count(bitmap)}
+            if group_by:
+                result['group_by'] = group_by
+                result['groups'] = [{'value': value, 'count': count}
+                                    for value, count in index.group_by(bitmap, group_by)]
+        except FilterSyntaxError as e:
+            self.send_json_response({'success': False, 'message': str(e)}, 400)
+            return
+        
+        self.send_json_response({'success': True, 'data': result})
+    
+    def handle_columns_request(self):
+        """返回已建立索引的列及其取值数量"""
+        index = self.get_bitmap_index()
+        if index is None:
+            return
+        columns = {column: len(values) for column, values in index.columns.items()}
+        self.send_json_response({'success': True, 'data': {'row_count': index.row_count, 'columns': columns}})
+    
+    def handle_export_request(self, params):
+        """
+        按看板筛选条件导出工单明细
+        参数：format=csv|xlsx，以及 build_export_bitmap 支持的筛选参数
+        响应以分块传输编码边生成边发送，不在内存中缓存整个文件
+        """
+        export_format = params.get('format', ['csv'])[0].lower()
+        if export_format not in EXPORT_FORMATS:
+            self.send_json_response({'success': False, 'message': f'不支持的导出格式: {export_format}'}, 400)
+            return
+        
+        index = self.get_bitmap_index()
+        if index is None:
+            return
+        if not self.excel_file_path.exists():
+            self.send_json_response({'success': False, 'message': '工单数据文件不存在'}, 404)
+            return
+        if self.excel_file_path.stat().st_mtime > Path(bitmap_store.file_path).stat().st_mtime:
+            self.send_json_response({'success': False, 'message': '数据正在更新，请稍后再试'}, 503)
+            return
+        
+        try:
+            bitmap = build_export_bitmap(index, params)
+        except (FilterSyntaxError, ExportFilterError) as e:
+            self.send_json_response({'success': False, 'message': str(e)}, 400)
+            return
+        
+        writer, content_type, extension = EXPORT_FORMATS[export_format]
+        filename = quote(f"工单明细.{extension}")
+        
+        # HTTP/1.1客户端使用分块传输；HTTP/1.0客户端以关闭连接表示结束
+        chunked = self.request_version == 'HTTP/1.1'
+        if chunked:
+            self.protocol_version = 'HTTP/1.1'
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{filename}")
+        self.send_header('X-Matched-Rows', str(index.count(bitmap)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'X-Matched-Rows')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        
+        def send_chunk(data):
+            if chunked:
+                self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+            else:
+                self.wfile.write(data)
+        
+        out = ChunkBuffer(send_chunk)
+        try:
+            count = writer(iter_selected_rows(self.excel_file_path, index, bitmap), out)
+            out.flush()
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+            print(f"导出完成: {export_format}，共{count}行")
+        except (BrokenPipeError, ConnectionResetError):
+            print("导出时客户端断开连接")
+        except Exception as e:
+            # 响应头已发送，只能中断连接让客户端感知下载失败
+            print(f"导出失败: {e}")
+    
+    def handle_diff_request(self, params):
+        """
+        快照对比查询
+        参数：base=较早快照编号, target=较新快照编号（默认为最近两份快照），
+        exclude_draft=1, granularity=month|half|year, top=20
+        """
+        snapshot_ids = snapshot_store.list()
+        target_id = params.get('target', [snapshot_ids[-1] if snapshot_ids else None])[0]
+        base_id = params.get('base', [None])[0]
+        if base_id is None:
+            earlier = [i for i in snapshot_ids if target_id and i < target_id]
+            base_id = earlier[-1] if earlier else None
+        if not base_id or not target_id:
+            self.send_json_response({'success': False, 'message': '快照不足两份，无法对比'}, 404)
+            return
+        
+        granularity = params.get('granularity', ['half'])[0]
+        if granularity not in ('month', 'half', 'year'):
+            self.send_json_response({'success': False, 'message': f'不支持的时间粒度: {granularity}'}, 400)
+            return
+        try:
+            top = int(params.get('top', [DEFAULT_TOP])[0])
+        except ValueError:
+            self.send_json_response({'success': False, 'message': '无效的top值'}, 400)
+            return
+        
+        try:
+            base, target = snapshot_store.get(base_id), snapshot_store.get(target_id)
+        except FileNotFoundError:
+            self.send_json_response({'success': False, 'message': f'快照不存在: {base_id} / {target_id}'}, 404)
+            return
+        
+        exclude_draft = params.get('exclude_draft', ['0'])[0] in ('1', 'true')
+        result = diff_snapshots(base, target, exclude_draft, granularity, max(1, top))
+        self.send_json_response({'success': True, 'data': result})
+    
+    def handle_tickets_request(self, params):
+        """
+        工单即席查询（从工单数据库读取，上传处理期间也可查询）
+        参数：year, month, top_dept, raw_dept, org, type, ticket_type, status, audit, applicant,
+        system, start, end, q, exclude_draft，以及 group_by=分组列 或 limit/offset 分页明细
+        """
+        try:
+            with ticket_db_pool.connection() as conn:
+                result = query_tickets(conn, params)
+        except FileNotFoundError:
+            self.send_json_response({'success': False, 'message': '工单数据库不存在，请先上传数据'}, 404)
+            return
+        except TicketQueryError as e:
+            self.send_json_response({'success': False, 'message': str(e)}, 400)
+            return
+        except TimeoutError as e:
+            self.send_json_response({'success': False, 'message': str(e)}, 503)
+            return
+        
+        self.send_json_response({'success': True, 'data': result})
+    
+    def resolve_static_path(self):
+        """将请求路径解析为upload_dir下的文件路径，越界时返回None"""
+        parsed_path = urlparse(self.path)
+        file_path = unquote(parsed_path.path).lstrip('/')
+        
+        # 如果是根路径，返回index.html
+        if not file_path or file_path == '/':
+            file_path = 'index.html'
+        
+        base_dir = self.upload_dir.resolve()
+        full_path = (base_dir / file_path).resolve()
+        if base_dir not in full_path.parents:
+            return None
+        return full_path
+    
+    def serve_static_file(self, head_only=False):
+        """
+        发送静态文件
+        支持ETag/Last-Modified条件请求、gzip/brotli预压缩版本、Range请求，
+        大文件通过sendfile零拷贝发送
+        """
+        full_path = self.resolve_static_path()
+        
+        # 检查文件是否存在
+        if full_path is None or not full_path.is_file():
+            self.send_error(404, "File not found")
+            return
+        
+        entry = static_cache.get(full_path)
+        content_type = self.get_content_type(full_path.name)
+        range_header = self.headers.get('Range')
+        
+        # Range请求只针对原始内容，不与压缩版本组合
+        encoding = 'identity' if range_header else choose_encoding(entry, self.headers.get('Accept-Encoding'))
+        etag = entry.variant_etag(encoding)
+        
+        # 条件请求：If-None-Match优先于If-Modified-Since
+        if_none_match = self.headers.get('If-None-Match')
+        if etag_matches(if_none_match, etag) or (
+                not if_none_match and not_modified_since(self.headers.get('If-Modified-Since'), entry)):
+            self.send_response(304)
+            self.send_cache_headers(entry, etag)
+            self.end_headers()
+            return
+        
+        status = 200
+        start, end = 0, entry.size - 1
+        if range_header and etag_matches(self.headers.get('If-Range', etag), etag):
+            byte_range = parse_range(range_header, entry.size)
+            if byte_range == (None, None):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{entry.size}')
+                self.send_header('Content-Length', '0')
+                self.send_cache_headers(entry, etag)
+                self.end_headers()
+                return
+            if byte_range is not None:
+                status = 206
+                start, end = byte_range
+        
+        body = entry.variants.get(encoding) if encoding != 'identity' else entry.data
+        length = len(body) if encoding != 'identity' else end - start + 1
+        
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(length))
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{entry.size}')
+        self.send_cache_headers(entry, etag)
+        self.end_headers()
+        
+        if head_only or length <= 0:
+            return
+        
+        if body is not None:
+            self.wfile.write(body[start:end + 1] if encoding == 'identity' else body)
+        else:
+            # 大文件不驻留内存，直接从磁盘零拷贝发送
+            with open(full_path, 'rb') as f:
+                self.connection.sendfile(f, offset=start, count=length)
+    
+    def send_cache_headers(self, entry, etag):
+        """发送缓存相关的响应头"""
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+    
     def get_content_type(self, file_path):
         """根据文件扩展名确定MIME类型"""
         ext = Path(file_path).suffix.lower()
@@ -93,73 +438,74 @@ class UploadHandler(BaseHTTPRequestHandler):
     
     def handle_file_upload(self):
         """处理文件上传"""
-        try:
-            # 解析multipart/form-data
-            content_type = self.headers.get('Content-Type', '')
-            if not content_type.startswith('multipart/form-data'):
-                self.send_json_response({'success': False, 'message': '无效的内容类型'}, 400)
-                return
+        with upload_lock:
+            try:
+                # 解析multipart/form-data
+                content_type = self.headers.get('Content-Type', '')
+                if not content_type.startswith('multipart/form-data'):
+                    self.send_json_response({'success': False, 'message': '无效的内容类型'}, 400)
+                    return
             
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
+                # 创建临时目录
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    temp_path = Path(temp_dir)
                 
-                # 解析表单数据
-                form = cgi.FieldStorage(
-                    fp=self.rfile,
-                    headers=self.headers,
-                    environ={
-                        'REQUEST_METHOD': 'POST',
-                        'CONTENT_TYPE': content_type
-                    }
-                )
+                    # 解析表单数据
+                    form = cgi.FieldStorage(
+                        fp=self.rfile,
+                        headers=self.headers,
+                        environ={
+                            'REQUEST_METHOD': 'POST',
+                            'CONTENT_TYPE': content_type
+                        }
+                    )
                 
-                # 获取上传的文件
-                if 'file' not in form:
-                    self.send_json_response({'success': False, 'message': '未找到上传文件'}, 400)
-                    return
+                    # 获取上传的文件
+                    if 'file' not in form:
+                        self.send_json_response({'success': False, 'message': '未找到上传文件'}, 400)
+                        return
                 
-                file_item = form['file']
-                if not file_item.filename:
-                    self.send_json_response({'success': False, 'message': '文件名为空'}, 400)
-                    return
+                    file_item = form['file']
+                    if not file_item.filename:
+                        self.send_json_response({'success': False, 'message': '文件名为空'}, 400)
+                        return
                 
-                # 验证文件类型
-                filename = file_item.filename.lower()
-                if not (filename.endswith('.xlsx') or filename.endswith('.xls')):
-                    self.send_json_response({'success': False, 'message': '只支持Excel文件(.xlsx/.xls)'}, 400)
-                    return
+                    # 验证文件类型
+                    filename = file_item.filename.lower()
+                    if not (filename.endswith('.xlsx') or filename.endswith('.xls')):
+                        self.send_json_response({'success': False, 'message': '只支持Excel文件(.xlsx/.xls)'}, 400)
+                        return
                 
-                # 保存临时文件
-                temp_file = temp_path / 'uploaded_file.xlsx'
-                with open(temp_file, 'wb') as f:
-                    f.write(file_item.file.read())
+                    # 保存临时文件
+                    temp_file = temp_path / 'uploaded_file.xlsx'
+                    with open(temp_file, 'wb') as f:
+                        f.write(file_item.file.read())
                 
-                # 备份原文件
-                backup_file = self.upload_dir / "需求工单统计表_backup.xlsx"
-                if self.excel_file_path.exists():
-                    shutil.copy2(self.excel_file_path, backup_file)
+                    # 备份原文件
+                    backup_file = self.upload_dir / "需求工单统计表_backup.xlsx"
+                    if self.excel_file_path.exists():
+                        shutil.copy2(self.excel_file_path, backup_file)
                 
-                # 替换原文件
-                shutil.copy2(temp_file, self.excel_file_path)
+                    # 替换原文件
+                    shutil.copy2(temp_file, self.excel_file_path)
                 
-                # 重新生成JSON数据
-                self.regenerate_data()
+                    # 重新生成JSON数据
+                    self.regenerate_data()
                 
-                self.send_json_response({'success': True, 'message': '文件上传成功'})
+                    self.send_json_response({'success': True, 'message': '文件上传成功'})
                 
-        except Exception as e:
-            print(f"文件上传处理错误: {e}")
-            # 如果有备份文件，恢复原文件
-            backup_file = self.upload_dir / "需求工单统计表_backup.xlsx"
-            if backup_file.exists():
-                try:
-                    shutil.copy2(backup_file, self.excel_file_path)
-                    backup_file.unlink()  # 删除备份文件
-                except:
-                    pass
+            except Exception as e:
+                print(f"文件上传处理错误: {e}")
+                # 如果有备份文件，恢复原文件
+                backup_file = self.upload_dir / "需求工单统计表_backup.xlsx"
+                if backup_file.exists():
+                    try:
+                        shutil.copy2(backup_file, self.excel_file_path)
+                        backup_file.unlink()  # 删除备份文件
+                    except:
+                        pass
             
-            self.send_json_response({'success': False, 'message': f'处理失败: {str(e)}'}, 500)
+                self.send_json_response({'success': False, 'message': f'处理失败: {str(e)}'}, 500)
     
     def regenerate_data(self):
         """重新生成JSON数据"""
@@ -171,7 +517,8 @@ class UploadHandler(BaseHTTPRequestHandler):
             
             # 执行数据处理脚本
             result = subprocess.run(
-                [sys.executable, str(data_processor_path)],
+                [sys.executable, str(data_processor_path), str(self.excel_file_path),
+                 '--workers', str(PARSE_WORKERS)],
                 cwd=str(self.upload_dir),
                 capture_output=True,
                 text=True,
@@ -183,6 +530,9 @@ class UploadHandler(BaseHTTPRequestHandler):
             
             print("数据重新生成成功")
             
+            # 预先加载并压缩新生成的数据，避免首个请求承担压缩开销
+            static_cache.warm(self.upload_dir / name for name in WARM_FILES)
+            
         except subprocess.TimeoutExpired:
             raise Exception("数据处理超时")
         except Exception as e:
@@ -207,7 +557,9 @@ class UploadHandler(BaseHTTPRequestHandler):
 def run_server(port=8001):
     """启动服务器"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, UploadHandler)
+    # 每个请求一个线程，上传处理期间静态文件和查询接口仍可响应；各缓存均已加锁
+    httpd = ThreadingHTTPServer(server_address, UploadHandler)
+    httpd.daemon_threads = True
     print(f"上传服务器启动在端口 {port}")
     print(f"访问地址: http://localhost:{port}")
     
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作簿并行解析
+共享字符串表和样式只读取一次，工作表XML按<row>边界切分为若干块，
+由进程池分别解析，再按行号顺序拼接，结果与 pd.read_excel 完全一致
+"""
+
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 每个进程分到的块数，块越多负载越均衡，但进程间传输开销越大
+CHUNKS_PER_WORKER = 4
+# 工作表XML小于该大小时直接串行读取，进程池的启动开销得不偿失
+MIN_PARALLEL_BYTES = 1024 * 1024
+
+SHEET_DATA_START = re.compile(rb'<sheetData\s*>')
+SHEET_DATA_END = b'</sheetData>'
+ROW_START = re.compile(rb'<row[\s>]')
+
+# 依赖openpyxl内部接口，版本变化导致这些异常时退回 pd.read_excel
+PRIVATE_API_ERRORS = (AttributeError, TypeError, ImportError)
+
+# 子进程的解析参数，由 init_worker 设置
+_worker_context = {}
+
+
+def init_worker(worksheet_tag, shared_strings, epoch, date_formats, timedelta_formats):
+    """进程池初始化：保存共享字符串表和日期格式，避免每个块重复传递"""
+    _worker_context.update({
+        'worksheet_tag': worksheet_tag,
+        'shared_strings': shared_strings,
+        'epoch': epoch,
+        'date_formats': date_formats,
+        'timedelta_formats': timedelta_formats,
+    })
+
+
+def convert_cell(cell):
+    """与pandas的openpyxl读取器一致的单元格转换"""
+    value = cell['value']
+    if value is None:
+        return ''
+    if cell['data_type'] == 'e':
+        return np.nan
+    if cell['data_type'] == 'n':
+        integer = int(value)
+        return integer if integer == value else float(value)
+    return value
+
+
+def parse_chunk(chunk):
+    """
+    解析一段<row>元素，返回 [(行号, 单元格值列表), ...]
+    缺失的单元格按openpyxl只读模式的规则补为空值
+    """
+    from openpyxl.worksheet._reader import WorkSheetParser
+
+    context = _worker_context
+    source = io.BytesIO(context['worksheet_tag'] + b'<sheetData>' + chunk + b'</sheetData></worksheet>')
+    parser = WorkSheetParser(source, context['shared_strings'], data_only=True, epoch=context['epoch'],
+                             date_formats=context['date_formats'],
+                             timedelta_formats=context['timedelta_formats'])
+    rows = []
+    for index, cells in parser.parse():
+        values = [''] * (cells[-1]['column'] if cells else 0)
+        for cell in cells:
+            values[cell['column'] - 1] = convert_cell(cell)
+        rows.append((index, values))
+    return rows
+
+
+def split_rows(sheet_data, chunk_count):
+    """按<row>边界将sheetData内容切分为大致等长的块"""
+    chunks = []
+    start = 0
+    size = len(sheet_data)
+    for i in range(1, chunk_count):
+        match = ROW_START.search(sheet_data, max(start + 1, size * i // chunk_count))
+        if not match:
+            break
+        chunks.append(sheet_data[start:match.start()])
+        start = match.start()
+    chunks.append(sheet_data[start:])
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def assemble_rows(parsed_chunks):
+    """
+    按行号拼接各块结果，并按pandas的规则去掉行尾空值和末尾空行、补齐行宽
+    """
+    data = []
+    last_row_with_data = -1
+    for rows in parsed_chunks:
+        for index, values in rows:
+            # 工作表中缺失的行补为空行
+            while len(data) < index - 1:
+                data.append([])
+            while values and values[-1] == '':
+                values.pop()
+            if values:
+                last_row_with_data = len(data)
+            data.append(values)
+    data = data[:last_row_with_data + 1]
+
+    if data:
+        max_width = max(len(row) for row in data)
+        data = [row + [''] * (max_width - len(row)) for row in data]
+    return data
+
+
+def read_excel_parallel(excel_file, workers=None):
+    """
+    并行读取工作簿的第一个工作表，等价于 pd.read_excel(excel_file)
+
+    Args:
+        excel_file (str): Excel文件路径
+        workers (int): 进程数，默认为CPU核数
+
+    Returns:
+        DataFrame: 与 pd.read_excel 相同的结果
+    """
+    from openpyxl import load_workbook
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        # 子进程使用的内部解析器，先在主进程确认可用
+        from openpyxl.worksheet._reader import WorkSheetParser  # noqa: F401
+        from pandas.io.parsers import TextParser
+
+        # 只读模式加载时会解析共享字符串表和样式，但不会解析工作表
+        workbook = load_workbook(excel_file, read_only=True, data_only=True, keep_links=False)
+        try:
+            worksheet = workbook.worksheets[0]
+            with zipfile.ZipFile(excel_file) as archive:
+                sheet_xml = archive.read(worksheet._worksheet_path)
+            # 只读模式下 workbook.shared_strings 为空，共享字符串表在工作表上
+            context = (worksheet._shared_strings, workbook.epoch,
+                       workbook._date_formats, workbook._timedelta_formats)
+        finally:
+            workbook.close()
+    except PRIVATE_API_ERRORS as e:
+        print(f"并行解析不可用（{e!r}），改为串行读取")
+        return pd.read_excel(excel_file)
+
+    start = SHEET_DATA_START.search(sheet_xml)
+    end = sheet_xml.rfind(SHEET_DATA_END)
+    worksheet_tag = re.search(rb'<worksheet\b[^>]*>', sheet_xml)
+    # 带命名空间前缀或缺少行号的工作表无法按块解析，交给串行路径
+    if (start is None or end < 0 or worksheet_tag is None or len(sheet_xml) < MIN_PARALLEL_BYTES
+            or workers <= 1 or re.search(rb'<row(?![^>]*\br=)[\s>]', sheet_xml)):
+        return pd.read_excel(excel_file)
+
+    chunks = split_rows(sheet_xml[start.end():end], workers * CHUNKS_PER_WORKER)
+    del sheet_xml
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(worksheet_tag.group(0),) + context) as executor:
+            data = assemble_rows(executor.map(parse_chunk, chunks))
+    except Exception as e:
+        # 子进程中的任何异常都退回串行读取，文件本身有问题时由 pd.read_excel 报告
+        print(f"并行解析失败（{e!r}），改为串行读取")
+        return pd.read_excel(excel_file)
+
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+def read_excel(excel_file, workers=1):
+    """workers大于1时并行解析，否则使用 pd.read_excel"""
+    if workers is not None and workers <= 1:
+        return pd.read_excel(excel_file)
+    return read_excel_parallel(excel_file, workers)